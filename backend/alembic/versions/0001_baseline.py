@@ -0,0 +1,181 @@
+"""baseline schema
+
+Takes over from the create_all/ALTER steps init_db used to run. Every
+statement is guarded (IF NOT EXISTS or a catalog check), so on a database
+init_db already built this only records the revision; on an empty one it
+creates the tables. Secondary indexes live in 0002, built concurrently.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.core.search.SEARCH_VECTOR_SQL at this revision
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(search_document, '')) || "
+    "to_tsvector('russian', coalesce(search_document, '')) || "
+    "to_tsvector('english', coalesce(search_document, ''))"
+)
+
+SEARCHABLE_TABLES = ("listing", "review", "user")
+
+
+def _search_columns():
+    return [
+        sa.Column("search_document", sa.Text()),
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True)),
+    ]
+
+
+def upgrade() -> None:
+    # btree_gist is needed by the booking overlap exclusion constraint,
+    # pg_trgm by the search indexes
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("full_name", sa.String()),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        *_search_columns(),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "listing",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String()),
+        sa.Column("region", sa.String()),
+        sa.Column("location", sa.String()),
+        sa.Column("price_per_night", sa.Float()),
+        sa.Column("rating", sa.Float()),
+        sa.Column("reviews_count", sa.Integer()),
+        sa.Column("rating_sum", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("guests_max", sa.Integer()),
+        sa.Column("rooms", sa.Integer()),
+        sa.Column("beds", sa.Integer()),
+        sa.Column("baths", sa.Integer()),
+        sa.Column("amenities", postgresql.JSONB()),
+        sa.Column("images", sa.JSON()),
+        sa.Column("video_url", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("google_maps_url", sa.String()),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+        sa.Column("geohash", sa.String(9)),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        *_search_columns(),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "amenity",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name_uz", sa.String()),
+        sa.Column("name_ru", sa.String()),
+        sa.Column("name_en", sa.String()),
+        sa.Column("icon", sa.String()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "settings",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("value", sa.String()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "booking",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id")),
+        sa.Column("listing_id", sa.Integer(), sa.ForeignKey("listing.id")),
+        sa.Column("check_in", sa.DateTime()),
+        sa.Column("check_out", sa.DateTime()),
+        sa.Column("guests", sa.Integer()),
+        sa.Column("total_price", sa.Float()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("customer_name", sa.String()),
+        sa.Column("customer_phone", sa.String()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "review",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("listing_id", sa.Integer(), sa.ForeignKey("listing.id", ondelete="CASCADE")),
+        sa.Column("user_name", sa.String()),
+        sa.Column("rating", sa.Integer()),
+        sa.Column("comment", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        *_search_columns(),
+        if_not_exists=True,
+    )
+
+    # Columns init_db used to add to tables created before they existed
+    op.add_column("listing", sa.Column("google_maps_url", sa.String()), if_not_exists=True)
+    op.add_column("listing", sa.Column("latitude", sa.Float()), if_not_exists=True)
+    op.add_column("listing", sa.Column("longitude", sa.Float()), if_not_exists=True)
+    op.add_column("listing", sa.Column("rating_sum", sa.Integer(), server_default="0", nullable=False), if_not_exists=True)
+    op.add_column("listing", sa.Column("geohash", sa.String(9)), if_not_exists=True)
+    for table in SEARCHABLE_TABLES:
+        for column in _search_columns():
+            op.add_column(table, column, if_not_exists=True)
+
+    # json -> jsonb so amenity filters can use a GIN index
+    amenities_type = op.get_bind().execute(sa.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'listing' AND column_name = 'amenities'"
+    )).scalar()
+    if amenities_type == "json":
+        op.execute("ALTER TABLE listing ALTER COLUMN amenities TYPE jsonb USING amenities::jsonb")
+
+    # Indexes that have existed since the tables were first created
+    op.create_index("ix_user_id", "user", ["id"], if_not_exists=True)
+    op.create_index("ix_user_full_name", "user", ["full_name"], if_not_exists=True)
+    op.create_index("ix_user_email", "user", ["email"], unique=True, if_not_exists=True)
+    op.create_index("ix_listing_id", "listing", ["id"], if_not_exists=True)
+    op.create_index("ix_listing_title", "listing", ["title"], if_not_exists=True)
+    op.create_index("ix_listing_region", "listing", ["region"], if_not_exists=True)
+    op.create_index("ix_amenity_id", "amenity", ["id"], if_not_exists=True)
+    op.create_index("ix_amenity_name_uz", "amenity", ["name_uz"], if_not_exists=True)
+    op.create_index("ix_amenity_name_ru", "amenity", ["name_ru"], if_not_exists=True)
+    op.create_index("ix_amenity_name_en", "amenity", ["name_en"], if_not_exists=True)
+    op.create_index("ix_settings_key", "settings", ["key"], if_not_exists=True)
+    op.create_index("ix_booking_id", "booking", ["id"], if_not_exists=True)
+    op.create_index("ix_review_id", "review", ["id"], if_not_exists=True)
+    op.create_index("ix_review_listing_id", "review", ["listing_id"], if_not_exists=True)
+    op.create_index("ix_review_user_name", "review", ["user_name"], if_not_exists=True)
+
+    # No two non-cancelled bookings of a listing may overlap. Fails if
+    # historical bookings already overlap; those must be fixed first.
+    exists = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'booking_no_overlap'"
+    )).first()
+    if not exists:
+        op.execute(
+            "ALTER TABLE booking ADD CONSTRAINT booking_no_overlap "
+            "EXCLUDE USING gist (listing_id WITH =, tsrange(check_in, check_out) WITH &&) "
+            "WHERE (status <> 'cancelled')"
+        )
+
+
+def downgrade() -> None:
+    for table in ("review", "booking", "settings", "amenity", "listing", "user"):
+        op.drop_table(table, if_exists=True)
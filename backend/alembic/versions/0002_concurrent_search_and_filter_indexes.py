@@ -0,0 +1,65 @@
+"""search, filter and sort indexes, built concurrently
+
+The indexes init_db used to create inline, which locked listing/review
+against writes for the length of each build. Each one is now built with
+CREATE INDEX CONCURRENTLY outside the migration transaction.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 14:05:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently, drop_index_concurrently
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCHABLE_TABLES = ("listing", "review", "user")
+
+
+def upgrade() -> None:
+    # (created_at, id) keyset order of the reviews list
+    create_index_concurrently("ix_review_created_at_id", "review", ["created_at", "id"])
+    # amenities @> '{"pool": true}' filters
+    create_index_concurrently(
+        "ix_listing_amenities", "listing", ["amenities"],
+        postgresql_using="gin", postgresql_ops={"amenities": "jsonb_path_ops"},
+    )
+    # sort=rating, usually within one status
+    create_index_concurrently(
+        "ix_listing_status_rating_id", "listing", ["status", sa.text("rating DESC"), sa.text("id DESC")]
+    )
+    # Radius and viewport queries
+    create_index_concurrently(
+        "ix_listing_location_point", "listing", [sa.text("point(longitude, latitude)")],
+        postgresql_using="gist",
+    )
+    # Cell lookups by geohash prefix
+    create_index_concurrently(
+        "ix_listing_geohash", "listing", ["geohash"], postgresql_ops={"geohash": "text_pattern_ops"}
+    )
+    for table in SEARCHABLE_TABLES:
+        create_index_concurrently(
+            f"ix_{table}_search_vector", table, ["search_vector"], postgresql_using="gin"
+        )
+        create_index_concurrently(
+            f"ix_{table}_search_document_trgm", table, ["search_document"],
+            postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for table in SEARCHABLE_TABLES:
+        drop_index_concurrently(f"ix_{table}_search_document_trgm", table)
+        drop_index_concurrently(f"ix_{table}_search_vector", table)
+    drop_index_concurrently("ix_listing_geohash", "listing")
+    drop_index_concurrently("ix_listing_location_point", "listing")
+    drop_index_concurrently("ix_listing_status_rating_id", "listing")
+    drop_index_concurrently("ix_listing_amenities", "listing")
+    drop_index_concurrently("ix_review_created_at_id", "review")
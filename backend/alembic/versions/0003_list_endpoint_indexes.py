@@ -0,0 +1,50 @@
+"""composite and partial indexes for the list endpoints
+
+One index per list access pattern, so every page is an index range scan
+in the requested order (checked by app.db.query_plans). ix_listing_region
+and ix_review_listing_id are prefixes of the new indexes and are dropped
+once those exist.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently, drop_index_concurrently
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently("ix_listing_status_id", "listing", ["status", sa.text("id DESC")])
+    create_index_concurrently(
+        "ix_listing_region_status_id", "listing", ["region", "status", sa.text("id DESC")]
+    )
+    create_index_concurrently("ix_booking_status_id", "booking", ["status", sa.text("id DESC")])
+    create_index_concurrently(
+        "ix_booking_listing_id_check_in", "booking", ["listing_id", "check_in", "check_out"],
+        postgresql_where=sa.text("status <> 'cancelled'"),
+    )
+    create_index_concurrently(
+        "ix_review_listing_id_created_at_id", "review",
+        ["listing_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    drop_index_concurrently("ix_listing_region", "listing")
+    drop_index_concurrently("ix_review_listing_id", "review")
+
+
+def downgrade() -> None:
+    create_index_concurrently("ix_review_listing_id", "review", ["listing_id"])
+    create_index_concurrently("ix_listing_region", "listing", ["region"])
+    drop_index_concurrently("ix_review_listing_id_created_at_id", "review")
+    drop_index_concurrently("ix_booking_listing_id_check_in", "booking")
+    drop_index_concurrently("ix_booking_status_id", "booking")
+    drop_index_concurrently("ix_listing_region_status_id", "listing")
+    drop_index_concurrently("ix_listing_status_id", "listing")
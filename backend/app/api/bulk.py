@@ -0,0 +1,287 @@
+"""
+Shared machinery for the /bulk endpoints.
+
+Items arrive as a JSON array or as NDJSON, are validated all at once, and
+are written in chunks of BULK_CHUNK_SIZE, one transaction per chunk.
+Writes go through the ORM (add_all + flush), which SQLAlchemy sends as
+batched multi-row statements, so the mapper events that keep counters,
+search documents, geohashes and ratings in sync still fire. If a chunk
+fails, its rows are retried one transaction each so a single bad row
+only fails itself. Every item gets a result at its request index.
+
+Bodies are read as they stream in and rejected once they pass
+BULK_MAX_BODY_BYTES (or announce more in Content-Length); NDJSON bodies
+are parsed line by line and rejected once they pass BULK_MAX_ITEMS.
+"""
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# (request index, row id or None, validated payload)
+Row = Tuple[int, Optional[int], Any]
+Writer = Callable[[Session, List[Row]], Dict[int, dict]]
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+# pgcode -> message shown for the row
+CONSTRAINT_MESSAGES = {
+    "23P01": "Listing is already booked for these dates",
+    "23503": "Referenced record does not exist",
+    "23505": "Duplicate value",
+}
+
+
+class ParseError:
+    def __init__(self, message: str):
+        self.message = message
+
+
+def ok(index: int, id: Optional[int] = None) -> dict:
+    return {"index": index, "ok": True, "id": id}
+
+
+def failed(index: int, error: Any, id: Optional[int] = None) -> dict:
+    return {"index": index, "ok": False, "id": id, "error": error}
+
+
+def _too_large() -> HTTPException:
+    limit = settings.BULK_MAX_BODY_BYTES // (1024 * 1024)
+    return HTTPException(status_code=413, detail=f"Body exceeds the {limit} MB limit")
+
+
+def _too_many() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} items per request")
+
+
+async def _body_chunks(request: Request) -> AsyncIterator[bytes]:
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.BULK_MAX_BODY_BYTES:
+        raise _too_large()
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > settings.BULK_MAX_BODY_BYTES:
+            raise _too_large()
+        yield chunk
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ParseError(str(e))
+
+
+async def _read_ndjson(request: Request) -> List[Any]:
+    items = []
+    pending = b""
+    async for chunk in _body_chunks(request):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            if len(items) == settings.BULK_MAX_ITEMS:
+                raise _too_many()
+            items.append(_parse_line(line))
+    if pending.strip():
+        if len(items) == settings.BULK_MAX_ITEMS:
+            raise _too_many()
+        items.append(_parse_line(pending))
+    return items
+
+
+async def read_items(request: Request) -> List[Any]:
+    """
+    Returns the items of a JSON array or NDJSON body. Lines that aren't
+    valid JSON become ParseError placeholders so they fail individually.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        return await _read_ndjson(request)
+
+    body = b"".join([chunk async for chunk in _body_chunks(request)])
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if isinstance(items, dict) and isinstance(items.get("items"), list):
+        items = items["items"]
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise _too_many()
+    return items
+
+
+def validate_items(
+    items: List[Any],
+    schema: Type[BaseModel],
+    require_id: bool = False,
+    check: Callable[[BaseModel], None] = None,
+) -> Tuple[List[Row], List[dict]]:
+    """
+    Validates every item against `schema`. Update items carry the target
+    row's "id" next to the fields to change. `check` may raise
+    HTTPException for cross-field rules. Returns (rows, failures).
+    """
+    rows, failures = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, ParseError):
+            failures.append(failed(index, f"Invalid JSON: {item.message}"))
+            continue
+        row_id = None
+        if require_id:
+            row_id = item.pop("id", None) if isinstance(item, dict) else None
+            if not isinstance(row_id, int):
+                failures.append(failed(index, "Each item needs an integer id"))
+                continue
+        try:
+            payload = schema.model_validate(item)
+            if check:
+                check(payload)
+        except ValidationError as e:
+            failures.append(failed(index, e.errors(include_url=False, include_context=False), row_id))
+            continue
+        except HTTPException as e:
+            failures.append(failed(index, e.detail, row_id))
+            continue
+        rows.append((index, row_id, payload))
+    return rows, failures
+
+
+def validate_ids(items: List[Any]) -> Tuple[List[Row], List[dict]]:
+    """
+    Delete requests: a list of ids, or of {"id": ...} objects.
+    """
+    rows, failures = [], []
+    for index, item in enumerate(items):
+        row_id = item.get("id") if isinstance(item, dict) else item
+        if isinstance(row_id, int) and not isinstance(row_id, bool):
+            rows.append((index, row_id, None))
+        else:
+            failures.append(failed(index, "Expected an integer id"))
+    return rows, failures
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, HTTPException):
+        return e.detail
+    if isinstance(e, DBAPIError):
+        code = getattr(e.orig, "pgcode", None)
+        if code in CONSTRAINT_MESSAGES:
+            return CONSTRAINT_MESSAGES[code]
+        return str(e.orig).splitlines()[0]
+    return str(e)
+
+
+def _chunks(rows: List[Row], size: int) -> Iterable[List[Row]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def run_bulk(db: Session, rows: List[Row], failures: List[dict], write: Writer) -> dict:
+    results = {r["index"]: r for r in failures}
+    for chunk in _chunks(rows, settings.BULK_CHUNK_SIZE):
+        try:
+            chunk_results = write(db, chunk)
+            db.commit()
+            results.update(chunk_results)
+            continue
+        except (DBAPIError, HTTPException):
+            db.rollback()
+
+        # Find the offending rows: one transaction per row
+        for row in chunk:
+            try:
+                row_results = write(db, [row])
+                db.commit()
+                results.update(row_results)
+            except (DBAPIError, HTTPException) as e:
+                db.rollback()
+                results[row[0]] = failed(row[0], _error_message(e), row[1])
+
+    ordered = [results[i] for i in sorted(results)]
+    succeeded = sum(1 for r in ordered if r["ok"])
+    return {"succeeded": succeeded, "failed": len(ordered) - succeeded, "results": ordered}
+
+
+def create_writer(model: type, to_kwargs: Callable[[BaseModel], dict]) -> Writer:
+    def write(db: Session, chunk: List[Row]) -> Dict[int, dict]:
+        objects = [(index, model(**to_kwargs(payload))) for index, _, payload in chunk]
+        db.add_all([obj for _, obj in objects])
+        db.flush()
+        return {index: ok(index, obj.id) for index, obj in objects}
+    return write
+
+
+def _load(db: Session, model: type, chunk: List[Row]) -> Dict[int, Any]:
+    ids = [row_id for _, row_id, _ in chunk]
+    return {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids)).all()}
+
+
+def update_writer(model: type, on_update: Callable[[Session, Any, dict], None] = None) -> Writer:
+    def write(db: Session, chunk: List[Row]) -> Dict[int, dict]:
+        existing = _load(db, model, chunk)
+        results = {}
+        for index, row_id, payload in chunk:
+            obj = existing.get(row_id)
+            if obj is None:
+                results[index] = failed(index, "Not found", row_id)
+                continue
+            update_data = payload.model_dump(exclude_unset=True)
+            for field, value in update_data.items():
+                setattr(obj, field, value)
+            if on_update:
+                on_update(db, obj, update_data)
+            results[index] = ok(index, row_id)
+        db.flush()
+        return results
+    return write
+
+
+def delete_writer(model: type) -> Writer:
+    def write(db: Session, chunk: List[Row]) -> Dict[int, dict]:
+        existing = _load(db, model, chunk)
+        results = {}
+        for index, row_id, _ in chunk:
+            obj = existing.get(row_id)
+            if obj is None:
+                results[index] = failed(index, "Not found", row_id)
+                continue
+            db.delete(obj)
+            results[index] = ok(index, row_id)
+        db.flush()
+        return results
+    return write
+
+
+async def process(
+    request: Request,
+    db: Session,
+    write: Writer,
+    schema: Type[BaseModel] = None,
+    require_id: bool = False,
+    check: Callable[[BaseModel], None] = None,
+) -> dict:
+    """
+    Reads, validates and writes one bulk request. Without a schema the
+    items are ids (deletes). The DB work runs in the threadpool.
+    """
+    items = await read_items(request)
+    if schema is None:
+        rows, failures = validate_ids(items)
+    else:
+        rows, failures = validate_items(items, schema, require_id, check)
+    return await run_in_threadpool(run_bulk, db, rows, failures, write)
+
+
+def succeeded_ids(result: dict) -> List[int]:
+    return [r["id"] for r in result["results"] if r["ok"] and r["id"] is not None]
@@ -5,18 +5,17 @@ from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core import security
+from app.core import security, principals
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
+from app.schemas.user import Principal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl="/api/v1/login/access-token"
 )
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
+def get_token_payload(token: str = Depends(reusable_oauth2)) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -27,14 +26,37 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data.sub).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return token_data
+
+def get_current_user(
+    db: Session = Depends(get_db), token_data: TokenPayload = Depends(get_token_payload)
+) -> Principal:
+    """
+    Resolves the token's user from the Redis principal cache, falling back
+    to the DB. The Session is only checked out on a cache miss.
+    """
+    principal, revoked = principals.lookup(token_data.sub, token_data.jti, token_data.iat)
+    if revoked is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is temporarily unavailable, try again later",
+        )
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+    if principal is None:
+        user = db.query(User).filter(User.id == token_data.sub).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal.model_validate(user)
+        principals.store(principal)
+    return principal
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if current_user.status != "active":
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
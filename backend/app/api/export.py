@@ -0,0 +1,97 @@
+"""
+Streaming CSV/NDJSON exports.
+
+Rows are read through a server-side cursor (yield_per, a named cursor on
+psycopg2) and written out one batch at a time, so memory stays
+flat however many rows match and the first bytes go out immediately.
+The generator opens its own session: the request's session is closed
+once the endpoint returns, before the body has been streamed.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Callable, Iterator, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    """
+    Validated up front: once streaming starts the status code is sent.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _generate(build_query: Callable[[Session], Query], fmt: str) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            build_query(db).statement,
+            execution_options={"yield_per": settings.EXPORT_BATCH_SIZE},
+        )
+        names = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(names)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        for partition in result.partitions():
+            if fmt == "csv":
+                writer.writerows([_csv_value(v) for v in row] for row in partition)
+            else:
+                for row in partition:
+                    buffer.write(json.dumps(dict(zip(names, row)), default=_json_default, ensure_ascii=False))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        db.close()
+
+
+def export_response(name: str, fmt: str, build_query: Callable[[Session], Query]) -> StreamingResponse:
+    """
+    Streams the rows of build_query(session) as CSV or NDJSON. The query
+    should select plain columns, not entities.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        _generate(build_query, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: Sequence[Any], direction: str) -> str:
+    payload = {
+        "v": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        "d": direction,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _coerce(value: Any, column: Any) -> Any:
+    """
+    A cursor value as the key column's Python type; forged cursors fail
+    here rather than in the database.
+    """
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if isinstance(value, (bool, list, dict)):
+        raise TypeError(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> Tuple[List[Any], str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["v"], payload["d"]
+        if direction not in ("next", "prev") or len(values) != len(columns):
+            raise ValueError(direction)
+        return [_coerce(v, col) for v, col in zip(values, columns)], direction
+    except (ValueError, KeyError, TypeError, NotImplementedError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def paginate_keyset(
+    query: Query,
+    columns: Sequence[Any],
+    size: int,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    count: Optional[Callable[[], int]] = None,
+) -> dict:
+    """
+    Keyset pagination over an unordered query, newest first by `columns`
+    (e.g. (id,) or (created_at, id)). Each page is a single index range
+    scan; the total is only counted when the client asks for it, using
+    `count` if given and a COUNT(*) of the query otherwise.
+    """
+    key = tuple_(*columns)
+    page_query = query
+    direction = "next"
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        if direction == "next":
+            page_query = page_query.filter(key < tuple_(*values))
+        else:
+            page_query = page_query.filter(key > tuple_(*values))
+
+    if direction == "next":
+        page_query = page_query.order_by(*[c.desc() for c in columns])
+    else:
+        page_query = page_query.order_by(*[c.asc() for c in columns])
+
+    rows = page_query.limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if direction == "prev":
+        rows.reverse()
+
+    def key_of(row):
+        return [getattr(row, c.key) for c in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == "next":
+            if has_more:
+                next_cursor = encode_cursor(key_of(rows[-1]), "next")
+            if cursor:
+                prev_cursor = encode_cursor(key_of(rows[0]), "prev")
+        else:
+            if has_more:
+                prev_cursor = encode_cursor(key_of(rows[0]), "prev")
+            next_cursor = encode_cursor(key_of(rows[-1]), "next")
+
+    return {
+        "items": rows,
+        "total": (count or query.count)() if with_total else None,
+        "size": size,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import listings, users, auth, upload, bookings, amenities, proxy, settings, reviews
+from app.api.v1.endpoints import listings, users, auth, upload, bookings, amenities, proxy, settings, reviews, metrics
 
 api_router = APIRouter()
 api_router.include_router(auth.router, tags=["auth"])
@@ -11,3 +11,4 @@ api_router.include_router(amenities.router, prefix="/amenities", tags=["amenitie
 api_router.include_router(proxy.router, prefix="/proxy", tags=["proxy"])
 api_router.include_router(settings.router, prefix="/settings", tags=["settings"])
 api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
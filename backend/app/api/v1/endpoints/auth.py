@@ -2,28 +2,47 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.core.config import settings
 from app.schemas.token import Token
-from app.core import security
+from app.core import security, principals, password_pool
 from app.models.user import User
+from app.schemas.token import TokenPayload
+from app.api.deps import get_token_payload
 
 router = APIRouter()
 
 @router.post("/login/access-token", response_model=Token)
-def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    result = await db.execute(
+        select(User.id, User.hashed_password).where(User.email == form_data.username)
+    )
+    user = result.first()
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
         
-    if not security.verify_password(form_data.password, user.hashed_password):
+    # bcrypt runs on the password pool, off the event loop and the shared threadpool
+    valid, new_hash = await password_pool.run(
+        security.verify_and_update, form_data.password, user.hashed_password
+    )
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+    if new_hash:
+        # Only if nobody changed the password since we read it
+        await db.execute(
+            update(User)
+            .where(User.id == user.id, User.hashed_password == user.hashed_password)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
         
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
@@ -32,3 +51,14 @@ def login_access_token(
         ),
         "token_type": "bearer",
     }
+
+@router.post("/login/logout")
+def logout(token_data: TokenPayload = Depends(get_token_payload)) -> Any:
+    """
+    Revokes the presented access token
+    """
+    if not token_data.jti:
+        raise HTTPException(status_code=400, detail="Token cannot be revoked, log in again")
+    if not principals.revoke_token(token_data.jti, token_data.exp):
+        raise HTTPException(status_code=503, detail="Logout is temporarily unavailable, try again later")
+    return {"msg": "Logged out"}
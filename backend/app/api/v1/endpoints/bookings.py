@@ -1,39 +1,142 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import case, func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
 from app.db.session import get_db
 from app.models.booking import Booking as BookingModel
+from app.models.listing import Listing as ListingModel
+from app.models.user import User as UserModel
 from app.schemas.booking import Booking, BookingCreate, BookingUpdate, BookingPagination
+from app.api.pagination import paginate_keyset
+from app.api import bulk
+from app.api.export import export_response, parse_date
+from app.db.counts import count_or_query, change_deltas, apply_deltas
+from app.schemas.bulk import BulkResult, BulkStatusUpdate
+from app.core.config import settings
 import math
 
 router = APIRouter()
 
-from sqlalchemy.orm import joinedload
+BOOKING_STATUSES = ("pending", "confirmed", "cancelled")
+
+# First key of the two-key advisory lock, so booking locks never collide
+# with other pg_advisory_* users of the same database.
+BOOKING_LOCK_NAMESPACE = 1001
+EXCLUSION_VIOLATION = "23P01"
+
+def lock_listing_calendar(db: Session, listing_id: int) -> None:
+    """
+    Serializes booking writes for one listing until the transaction ends.
+    Bookings for other listings proceed in parallel.
+    """
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, :listing_id)"),
+        {"namespace": BOOKING_LOCK_NAMESPACE, "listing_id": listing_id}
+    )
+
+def ensure_available(
+    db: Session,
+    listing_id: int,
+    check_in: datetime,
+    check_out: datetime,
+    exclude_id: int = None
+) -> None:
+    if check_in is None or check_out is None or check_out <= check_in:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in")
+
+    lock_listing_calendar(db, listing_id)
+    query = db.query(BookingModel.id).filter(
+        BookingModel.listing_id == listing_id,
+        BookingModel.status != "cancelled",
+        BookingModel.check_in < check_out,
+        BookingModel.check_out > check_in
+    )
+    if exclude_id is not None:
+        query = query.filter(BookingModel.id != exclude_id)
+    if query.first():
+        raise HTTPException(status_code=409, detail="Listing is already booked for these dates")
+
+def commit_booking(db: Session, booking: BookingModel) -> None:
+    db.add(booking)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        # booking_no_overlap exclusion constraint, the last line of defence
+        if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+            raise HTTPException(status_code=409, detail="Listing is already booked for these dates")
+        raise
+    db.refresh(booking)
+
+# Only what the list response shows; no ORM entities are built
+BOOKING_LIST_COLUMNS = (
+    BookingModel.id,
+    BookingModel.user_id,
+    BookingModel.listing_id,
+    BookingModel.check_in,
+    BookingModel.check_out,
+    BookingModel.guests,
+    BookingModel.total_price,
+    BookingModel.status,
+    BookingModel.created_at,
+    BookingModel.customer_name,
+    BookingModel.customer_phone,
+)
+
+def booking_list_query(db: Session):
+    """
+    Bookings with the display fields the UI needs, computed in SQL from
+    two many-to-one outer joins that only read users.full_name and
+    listing.title.
+    """
+    user_name = func.coalesce(
+        func.nullif(BookingModel.customer_name, ""),
+        case(
+            (UserModel.id.isnot(None), UserModel.full_name),
+            else_=func.concat("User #", BookingModel.user_id),
+        ),
+    )
+    listing_title = case(
+        (ListingModel.id.isnot(None), ListingModel.title),
+        else_=func.concat("Listing #", BookingModel.listing_id),
+    )
+    return (
+        db.query(*BOOKING_LIST_COLUMNS, user_name.label("user_name"), listing_title.label("listing_title"))
+        .select_from(BookingModel)
+        .outerjoin(UserModel, UserModel.id == BookingModel.user_id)
+        .outerjoin(ListingModel, ListingModel.id == BookingModel.listing_id)
+    )
 
 @router.get("/", response_model=BookingPagination)
 def read_bookings(
     db: Session = Depends(get_db),
     page: int = 1,
     size: int = 10,
-    status: str = None
+    status: str = None,
+    pagination: str = "offset",
+    cursor: str = None,
+    with_total: bool = False
 ) -> Any:
-    skip = (page - 1) * size
-    
-    query = db.query(BookingModel).options(
-        joinedload(BookingModel.user),
-        joinedload(BookingModel.listing)
-    ).order_by(BookingModel.id.desc())
+    query = booking_list_query(db)
     
     if status and status != 'all':
         query = query.filter(BookingModel.status == status)
     
-    total = query.count()
-    bookings = query.offset(skip).limit(size).all()
-    
-    # Populate extra fields for UI
-    for b in bookings:
-        b.user_name = b.customer_name or (b.user.full_name if b.user else f"User #{b.user_id}")
-        b.listing_title = b.listing.title if b.listing else f"Listing #{b.listing_id}"
+    count_filters = {"status": status if status and status != 'all' else None}
+    def count():
+        return count_or_query(query, "booking", count_filters)
+
+    if pagination == "cursor" or cursor:
+        result = paginate_keyset(query, [BookingModel.id], size, cursor, with_total, count)
+        result["items"] = [row._asdict() for row in result["items"]]
+        return result
+
+    skip = (page - 1) * size
+    total = count()
+    bookings = [row._asdict() for row in query.order_by(BookingModel.id.desc()).offset(skip).limit(size).all()]
     
     return {
         "items": bookings,
@@ -43,6 +146,173 @@ def read_bookings(
         "pages": math.ceil(total / size) if total > 0 else 0
     }
     
+@router.get("/export")
+def export_bookings(
+    format: str = "csv",
+    status: str = None,
+    listing_id: int = None,
+    start_date: str = None,
+    end_date: str = None
+):
+    """
+    Streams all matching bookings as CSV or NDJSON in one response.
+    start_date/end_date filter on check_in, e.g. a whole season.
+    """
+    start = parse_date(start_date, "start_date")
+    end = parse_date(end_date, "end_date")
+
+    def build_query(db: Session):
+        query = booking_list_query(db)
+        if status and status != "all":
+            query = query.filter(BookingModel.status == status)
+        if listing_id:
+            query = query.filter(BookingModel.listing_id == listing_id)
+        if start:
+            query = query.filter(BookingModel.check_in >= start)
+        if end:
+            query = query.filter(BookingModel.check_in <= end)
+        return query.order_by(BookingModel.id)
+
+    return export_response("bookings", format, build_query)
+
+def has_overlaps(db: Session, booking_ids: List[int]) -> bool:
+    """
+    Whether any of the given bookings overlaps another non-cancelled
+    booking of its listing. Mirrors the booking_no_overlap constraint.
+    """
+    if not booking_ids:
+        return False
+    other = aliased(BookingModel)
+    return db.query(BookingModel.id).join(
+        other,
+        (other.listing_id == BookingModel.listing_id)
+        & (other.id != BookingModel.id)
+        & (other.check_in < BookingModel.check_out)
+        & (other.check_out > BookingModel.check_in)
+    ).filter(
+        BookingModel.id.in_(booking_ids),
+        BookingModel.status != "cancelled",
+        other.status != "cancelled"
+    ).first() is not None
+
+def check_dates(booking: BookingCreate) -> None:
+    if booking.check_out <= booking.check_in:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in")
+
+def check_calendar_update(db: Session, booking: BookingModel, update_data: dict) -> None:
+    calendar_fields = {"listing_id", "check_in", "check_out", "status"}
+    if calendar_fields & update_data.keys() and booking.status != "cancelled":
+        ensure_available(
+            db, booking.listing_id, booking.check_in, booking.check_out, exclude_id=booking.id
+        )
+
+def write_bookings(db: Session, chunk: List[bulk.Row]) -> dict:
+    """
+    Bulk create writer. Checks every booking against the calendar and
+    against the chunk's earlier rows; a conflict fails the chunk, and the
+    per-row retry then pins it on the offending rows.
+    """
+    accepted = []
+    for listing_id in sorted({p.listing_id for _, _, p in chunk}):
+        lock_listing_calendar(db, listing_id)
+    for _, _, p in chunk:
+        if p.status != "cancelled":
+            ensure_available(db, p.listing_id, p.check_in, p.check_out)
+            for other in accepted:
+                if other.listing_id == p.listing_id and other.check_in < p.check_out and other.check_out > p.check_in:
+                    raise HTTPException(status_code=409, detail="Listing is already booked for these dates")
+            accepted.append(p)
+    write = bulk.create_writer(
+        BookingModel, lambda p: p.model_dump(exclude={"user_name", "listing_title"})
+    )
+    return write(db, chunk)
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_bookings_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Creates bookings from a JSON array or NDJSON of BookingCreate items,
+    e.g. to import historical bookings.
+    """
+    return await bulk.process(request, db, write_bookings, BookingCreate, check=check_dates)
+
+@router.put("/bulk", response_model=BulkResult)
+async def update_bookings_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Updates bookings; each item is {"id": ..., <fields to change>}.
+    """
+    write = bulk.update_writer(BookingModel, on_update=check_calendar_update)
+    return await bulk.process(request, db, write, BookingUpdate, require_id=True)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_bookings_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Deletes bookings by id; the body is a list of ids.
+    """
+    return await bulk.process(request, db, bulk.delete_writer(BookingModel))
+
+@router.post("/bulk/status", response_model=BulkResult)
+def update_booking_status_bulk(
+    *,
+    db: Session = Depends(get_db),
+    status_in: BulkStatusUpdate
+) -> Any:
+    """
+    Sets the status of many bookings (e.g. confirm all) with one UPDATE.
+    It either applies to every found booking or, if that would double
+    book a listing, to none (409).
+    """
+    if status_in.status not in BOOKING_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(BOOKING_STATUSES)}")
+    if len(status_in.ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} ids per request")
+
+    if status_in.status != "cancelled":
+        listing_ids = db.query(BookingModel.listing_id).filter(
+            BookingModel.id.in_(status_in.ids)
+        ).distinct().all()
+        # Same per-listing locks as single writes, in a fixed order
+        for (listing_id,) in sorted(listing_ids, key=lambda r: r[0] or 0):
+            if listing_id is not None:
+                lock_listing_calendar(db, listing_id)
+
+    # The CTE reads (and locks) the old status, which the counters need
+    old = (
+        select(BookingModel.id, BookingModel.status)
+        .where(BookingModel.id.in_(status_in.ids))
+        .with_for_update()
+        .cte("old")
+    )
+    statement = (
+        update(BookingModel)
+        .where(BookingModel.id == old.c.id)
+        .values(status=status_in.status)
+        .returning(BookingModel.id, old.c.status)
+    )
+    try:
+        changed = dict(db.execute(statement).all())
+        if status_in.status != "cancelled" and has_overlaps(db, list(changed)):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Listing is already booked for these dates")
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+            raise HTTPException(status_code=409, detail="Listing is already booked for these dates")
+        raise
+
+    deltas = Counter()
+    for old_status in changed.values():
+        if old_status != status_in.status:
+            deltas.update(change_deltas("booking", {"status": old_status}, {"status": status_in.status}))
+    apply_deltas(deltas)
+
+    results = [
+        bulk.ok(index, id) if id in changed else bulk.failed(index, "Not found", id)
+        for index, id in enumerate(status_in.ids)
+    ]
+    succeeded = sum(1 for r in results if r["ok"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
 @router.post("/", response_model=Booking)
 def create_booking(
     *,
@@ -52,9 +322,9 @@ def create_booking(
     booking = BookingModel(
         **booking_in.model_dump(exclude={"user_name", "listing_title"})
     )
-    db.add(booking)
-    db.commit()
-    db.refresh(booking)
+    if booking.status != "cancelled":
+        ensure_available(db, booking.listing_id, booking.check_in, booking.check_out)
+    commit_booking(db, booking)
     return booking
 
 @router.get("/{id}", response_model=Booking)
@@ -83,9 +353,8 @@ def update_booking(
     for field, value in update_data.items():
         setattr(booking, field, value)
     
-    db.add(booking)
-    db.commit()
-    db.refresh(booking)
+    check_calendar_update(db, booking, update_data)
+    commit_booking(db, booking)
     return booking
 
 @router.delete("/{id}", response_model=Booking)
@@ -1,15 +1,36 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.listing import Listing as ListingModel
-from app.schemas.listing import Listing, ListingCreate, ListingUpdate, ListingPagination
-import json
+from app.schemas.listing import Listing, ListingCreate, ListingUpdate, ListingPagination, ListingCluster
 import math
-from app.core.redis_client import redis_client
+from sqlalchemy import and_, cast, func, select, true
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core import cache, geo
+from app.core.config import settings
+from app.api.pagination import paginate_keyset
+from app.api import bulk
+from app.schemas.bulk import BulkResult
+from app.db.counts import count_or_query
+from app.core.search import search_filter
 
 router = APIRouter()
 
+# "at least n" thresholds reported as facets
+GUEST_FACETS = (2, 4, 6, 8, 10, 15)
+ROOM_FACETS = (1, 2, 3, 4, 5)
+SORT_OPTIONS = ("newest", "rating")
+
+def invalidate_listing_cache(listing_id: int = None) -> None:
+    tags = ["listings"]
+    if listing_id is not None:
+        tags.append(f"listing:{listing_id}")
+    cache.invalidate_tags(*tags)
+
+def invalidate_listings_cache(listing_ids: List[int]) -> None:
+    cache.invalidate_tags("listings", *(f"listing:{i}" for i in listing_ids))
+
 @router.get("/", response_model=ListingPagination)
 def read_listings(
     db: Session = Depends(get_db),
@@ -17,33 +38,332 @@ def read_listings(
     size: int = 10,
     region: str = None,
     search: str = None,
-    status: str = "active"
+    status: str = "active",
+    pagination: str = "offset",
+    cursor: str = None,
+    with_total: bool = False,
+    lat: float = None,
+    lng: float = None,
+    radius_km: float = None,
+    bbox: str = None,
+    min_price: float = None,
+    max_price: float = None,
+    min_guests: int = None,
+    min_rooms: int = None,
+    amenities: str = None,
+    facets: bool = False,
+    sort: str = "newest"
 ) -> Any:
-    skip = (page - 1) * size
-    
-    query = db.query(ListingModel).order_by(ListingModel.id.desc())
+    """
+    Offset pagination by default. pagination=cursor switches to keyset
+    pages on id, navigated with next_cursor/prev_cursor; total is then
+    only computed when with_total=true.
+
+    lat/lng returns listings within radius_km of the point, nearest
+    first, with distance_km set. bbox=min_lng,min_lat,max_lng,max_lat
+    returns listings inside a map viewport.
+
+    min_price/max_price, min_guests, min_rooms and amenities (comma
+    separated keys, all required) narrow the results. facets=true adds
+    amenity, price bucket and capacity counts over the filtered listings.
+
+    sort=rating orders by rating (highest first) instead of newest/relevance
+    or distance.
+    """
+    if sort not in SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_OPTIONS)}")
+    search = search.strip() if search else None
+    use_cursor = pagination == "cursor" or bool(cursor)
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="lat and lng must be given together")
+    if lat is not None:
+        geo.validate_point(lat, lng)
+        radius_km = radius_km or settings.GEO_DEFAULT_RADIUS_KM
+        if not 0 < radius_km <= settings.GEO_MAX_RADIUS_KM:
+            raise HTTPException(
+                status_code=400, detail=f"radius_km must be between 0 and {settings.GEO_MAX_RADIUS_KM}"
+            )
+        if use_cursor:
+            raise HTTPException(status_code=400, detail="Radius search is ordered by distance; use offset pagination")
+    bounds = geo.parse_bbox(bbox) if bbox else None
+    amenity_keys = sorted({a.strip() for a in amenities.split(",") if a.strip()}) if amenities else []
+    params = {
+        "page": None if use_cursor else page,
+        "size": size,
+        "region": region or None,
+        "search": search.lower() if search else None,
+        "status": status if status and status != "all" else "all",
+        "cursor": cursor if use_cursor else None,
+        "with_total": with_total if use_cursor else None,
+        "lat": lat,
+        "lng": lng,
+        "radius_km": radius_km if lat is not None else None,
+        "bbox": bounds,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_guests": min_guests,
+        "min_rooms": min_rooms,
+        "amenities": amenity_keys or None,
+        "facets": facets or None,
+        "sort": sort,
+    }
+    return cache.get_or_set(
+        "listings",
+        params,
+        tags=["listings"],
+        loader=lambda: _query_listings(
+            db, page, size, region, search, status, use_cursor, cursor, with_total,
+            lat=lat, lng=lng, radius_km=radius_km, bounds=bounds,
+            min_price=min_price, max_price=max_price, min_guests=min_guests,
+            min_rooms=min_rooms, amenities=amenity_keys, with_facets=facets,
+            sort=sort
+        ),
+    )
+
+def _query_listings(
+    db: Session,
+    page: int,
+    size: int,
+    region: str,
+    search: str,
+    status: str,
+    use_cursor: bool = False,
+    cursor: str = None,
+    with_total: bool = False,
+    lat: float = None,
+    lng: float = None,
+    radius_km: float = None,
+    bounds: geo.BBox = None,
+    min_price: float = None,
+    max_price: float = None,
+    min_guests: int = None,
+    min_rooms: int = None,
+    amenities: List[str] = None,
+    with_facets: bool = False,
+    sort: str = "newest"
+) -> dict:
+    query = db.query(ListingModel)
     if region:
         query = query.filter(ListingModel.region == region)
     
     if status and status != "all":
         query = query.filter(ListingModel.status == status)
+    rank = None
     if search:
-        search_filter = f"%{search}%"
+        clause, rank = search_filter(ListingModel, search)
+        query = query.filter(clause)
+
+    distance = None
+    if lat is not None:
+        # The bounding box is served by the GiST index, the exact
+        # distance check only runs on what it lets through
+        distance = geo.distance_km(ListingModel, lat, lng)
         query = query.filter(
-            (ListingModel.title.ilike(search_filter)) | 
-            (ListingModel.location.ilike(search_filter))
+            geo.within_bbox(ListingModel, geo.radius_bbox(lat, lng, radius_km)),
+            distance <= radius_km,
         )
+    if bounds:
+        query = query.filter(geo.within_bbox(ListingModel, bounds))
+
+    attribute_filtered = False
+    if min_price is not None:
+        query = query.filter(ListingModel.price_per_night >= min_price)
+        attribute_filtered = True
+    if max_price is not None:
+        query = query.filter(ListingModel.price_per_night <= max_price)
+        attribute_filtered = True
+    if min_guests is not None:
+        query = query.filter(ListingModel.guests_max >= min_guests)
+        attribute_filtered = True
+    if min_rooms is not None:
+        query = query.filter(ListingModel.rooms >= min_rooms)
+        attribute_filtered = True
+    if amenities:
+        # Containment is served by the GIN index on amenities
+        query = query.filter(ListingModel.amenities.contains({key: True for key in amenities}))
+        attribute_filtered = True
     
-    total = query.count()
-    listings = query.offset(skip).limit(size).all()
+    # Maintained counters only cover region/status
+    count_filters = {
+        "region": region or None,
+        "status": status if status and status != "all" else None,
+    }
+    def count():
+        if search or lat is not None or bounds or attribute_filtered:
+            return query.count()
+        return count_or_query(query, "listing", count_filters)
+
+    facet_counts = _listing_facets(db, query) if with_facets else None
+
+    # Served by ix_listing_status_rating_id
+    by_rating = [ListingModel.rating, ListingModel.id]
+
+    if use_cursor:
+        columns = by_rating if sort == "rating" else [ListingModel.id]
+        result = paginate_keyset(query, columns, size, cursor, with_total, count)
+        result["facets"] = facet_counts
+        return ListingPagination.model_validate(result, from_attributes=True).model_dump(mode="json")
+
+    skip = (page - 1) * size
+    total = count()
+    if distance is not None:
+        order = [c.desc() for c in by_rating] if sort == "rating" else [distance, ListingModel.id]
+        rows = query.add_columns(distance).order_by(*order).offset(skip).limit(size).all()
+        listings = []
+        for listing, distance_km in rows:
+            listing.distance_km = round(distance_km, 2)
+            listings.append(listing)
+    else:
+        if sort == "rating":
+            order = [c.desc() for c in by_rating]
+        elif rank is not None:
+            order = [rank.desc(), ListingModel.id.desc()]
+        else:
+            order = [ListingModel.id.desc()]
+        listings = query.order_by(*order).offset(skip).limit(size).all()
     
-    return {
+    result = {
         "items": listings,
         "total": total,
         "page": page,
         "size": size,
-        "pages": math.ceil(total / size) if total > 0 else 0
+        "pages": math.ceil(total / size) if total > 0 else 0,
+        "facets": facet_counts
     }
+    return ListingPagination.model_validate(result, from_attributes=True).model_dump(mode="json")
+
+def _listing_facets(db: Session, query) -> dict:
+    """
+    Facet counts over the filtered listings: one aggregate with a FILTER
+    clause per bucket, plus one grouped pass over the amenity keys.
+    """
+    base = query.with_entities(
+        ListingModel.price_per_night, ListingModel.guests_max,
+        ListingModel.rooms, ListingModel.amenities
+    ).order_by(None).subquery()
+
+    bounds = [None, *settings.LISTING_PRICE_BUCKETS, None]
+    price_buckets = list(zip(bounds[:-1], bounds[1:]))
+    aggregates = []
+    for low, high in price_buckets:
+        conditions = []
+        if low is not None:
+            conditions.append(base.c.price_per_night >= low)
+        if high is not None:
+            conditions.append(base.c.price_per_night < high)
+        aggregates.append(func.count().filter(and_(*conditions)))
+    aggregates += [func.count().filter(base.c.guests_max >= n) for n in GUEST_FACETS]
+    aggregates += [func.count().filter(base.c.rooms >= n) for n in ROOM_FACETS]
+    row = list(db.execute(select(*aggregates).select_from(base)).one())
+
+    prices = [
+        {"min": low, "max": high, "count": n}
+        for (low, high), n in zip(price_buckets, row[:len(price_buckets)])
+    ]
+    row = row[len(price_buckets):]
+    guests = {str(n): c for n, c in zip(GUEST_FACETS, row[:len(GUEST_FACETS)])}
+    rooms = {str(n): c for n, c in zip(ROOM_FACETS, row[len(GUEST_FACETS):])}
+
+    entry = func.jsonb_each(base.c.amenities).table_valued("key", "value").render_derived()
+    amenity_rows = db.execute(
+        select(entry.c.key, func.count())
+        .select_from(base)
+        .join(entry, true())
+        # Listings saved without amenities hold JSON null, which jsonb_each rejects
+        .where(func.jsonb_typeof(base.c.amenities) == "object")
+        .where(entry.c.value == cast(True, JSONB))
+        .group_by(entry.c.key)
+    ).all()
+
+    return {
+        "amenities": dict(amenity_rows),
+        "price": prices,
+        "guests": guests,
+        "rooms": rooms,
+    }
+
+@router.get("/map/clusters", response_model=List[ListingCluster])
+def read_listing_clusters(
+    db: Session = Depends(get_db),
+    bbox: str = None,
+    zoom: int = 10,
+    region: str = None,
+    status: str = "active"
+) -> Any:
+    """
+    Listings inside the viewport grouped into geohash cells sized for the
+    zoom level, so the map doesn't have to load every listing. Cells with
+    a single listing carry its id.
+    """
+    if not bbox:
+        raise HTTPException(status_code=400, detail="bbox is required")
+    bounds = geo.parse_bbox(bbox)
+    precision = geo.precision_for_zoom(zoom)
+    params = {
+        "bbox": bounds,
+        "precision": precision,
+        "region": region or None,
+        "status": status if status and status != "all" else "all",
+    }
+
+    def load():
+        cell = func.left(ListingModel.geohash, precision).label("cell")
+        query = db.query(
+            cell,
+            func.count(ListingModel.id),
+            func.avg(ListingModel.latitude),
+            func.avg(ListingModel.longitude),
+            func.min(ListingModel.price_per_night),
+            func.min(ListingModel.id),
+        ).filter(geo.within_bbox(ListingModel, bounds), ListingModel.geohash.isnot(None))
+        if region:
+            query = query.filter(ListingModel.region == region)
+        if status and status != "all":
+            query = query.filter(ListingModel.status == status)
+        return [
+            ListingCluster(
+                geohash=geohash,
+                count=count,
+                latitude=latitude,
+                longitude=longitude,
+                min_price=min_price,
+                listing_id=listing_id if count == 1 else None,
+            ).model_dump(mode="json")
+            for geohash, count, latitude, longitude, min_price, listing_id in query.group_by(cell).all()
+        ]
+
+    return cache.get_or_set("listing_clusters", params, tags=["listings"], loader=load)
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_listings_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Creates listings from a JSON array or NDJSON of ListingCreate items.
+    """
+    result = await bulk.process(
+        request, db, bulk.create_writer(ListingModel, lambda p: p.model_dump()), ListingCreate
+    )
+    invalidate_listings_cache(bulk.succeeded_ids(result))
+    return result
+
+@router.put("/bulk", response_model=BulkResult)
+async def update_listings_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Updates listings; each item is {"id": ..., <fields to change>}.
+    """
+    result = await bulk.process(
+        request, db, bulk.update_writer(ListingModel), ListingUpdate, require_id=True
+    )
+    invalidate_listings_cache(bulk.succeeded_ids(result))
+    return result
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_listings_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Deletes listings by id; the body is a list of ids.
+    """
+    result = await bulk.process(request, db, bulk.delete_writer(ListingModel))
+    invalidate_listings_cache(bulk.succeeded_ids(result))
+    return result
 
 @router.post("/", response_model=Listing)
 def create_listing(
@@ -55,6 +375,7 @@ def create_listing(
     db.add(listing)
     db.commit()
     db.refresh(listing)
+    invalidate_listing_cache(listing.id)
     return listing
 
 @router.get("/{id}", response_model=Listing)
@@ -63,7 +384,13 @@ def read_listing(
     db: Session = Depends(get_db),
     id: int
 ) -> Any:
-    listing = db.query(ListingModel).filter(ListingModel.id == id).first()
+    def load():
+        listing = db.query(ListingModel).filter(ListingModel.id == id).first()
+        if not listing:
+            return None
+        return Listing.model_validate(listing).model_dump(mode="json")
+
+    listing = cache.get_or_set("listing", {"id": id}, tags=[f"listing:{id}"], loader=load)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     return listing
@@ -86,6 +413,7 @@ def update_listing(
     db.add(listing)
     db.commit()
     db.refresh(listing)
+    invalidate_listing_cache(listing.id)
     return listing
 
 @router.delete("/{id}", response_model=Listing)
@@ -99,4 +427,5 @@ def delete_listing(
         raise HTTPException(status_code=404, detail="Listing not found")
     db.delete(listing)
     db.commit()
+    invalidate_listing_cache(id)
     return listing
@@ -0,0 +1,41 @@
+from typing import Any
+from fastapi import APIRouter
+from app.core import cache, media_cache, http_client, image_pool, password_pool
+
+router = APIRouter()
+
+@router.get("/cache")
+def read_cache_metrics() -> Any:
+    """
+    Hit/miss counters of the Redis response cache, per namespace.
+    """
+    return cache.get_stats()
+
+@router.get("/media-cache")
+def read_media_cache_metrics() -> Any:
+    """
+    Disk usage of the proxy media cache; hit/miss counters are under
+    the "media" namespace of /metrics/cache.
+    """
+    return media_cache.get_usage()
+
+@router.get("/http-pool")
+def read_http_pool_metrics() -> Any:
+    """
+    Connection usage of the shared outbound HTTP client, per upstream host.
+    """
+    return http_client.get_pool_stats()
+
+@router.get("/image-pool")
+def read_image_pool_metrics() -> Any:
+    """
+    Queue depth and per-job timings of this worker's image conversion pool.
+    """
+    return image_pool.get_stats()
+
+@router.get("/password-pool")
+def read_password_pool_metrics() -> Any:
+    """
+    Queue depth and per-job timings of this worker's bcrypt pool.
+    """
+    return password_pool.get_stats()
@@ -1,16 +1,83 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import httpx
 import os
 from app.core.config import settings
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.core.db_settings import get_telegram_settings
+from app.core.db_settings import get_cached_telegram_settings
+from app.core import cache, media_cache
+from app.core.http_client import get_http_client
+from app.core.redis_client import redis_client
+import redis
 
 router = APIRouter()
 
+FILE_PATH_CACHE_NAMESPACE = "telegram_file_path"
+# Telegram answers these when a file_path is no longer valid for download
+STALE_LINK_STATUSES = {400, 403, 404, 410}
+
+def _file_path_key(file_id: str) -> str:
+    return f"telegram:file_path:{file_id}"
+
+# Blocking Redis calls, run in the threadpool by resolve_file_path
+def _cached_file_path(key: str):
+    try:
+        cached = redis_client.get(key)
+    except redis.RedisError:
+        cached = None
+    cache.record(FILE_PATH_CACHE_NAMESPACE, "hits" if cached else "misses")
+    return cached
+
+def _store_file_path(key: str, file_path: str) -> None:
+    try:
+        redis_client.set(key, file_path, ex=settings.TELEGRAM_FILE_PATH_TTL_SECONDS)
+    except redis.RedisError:
+        pass
+
+async def resolve_file_path(
+    client: httpx.AsyncClient, token: str, file_id: str, refresh: bool = False
+) -> str:
+    """
+    Resolves file_id -> file_path via getFile. Results are shared by all
+    workers through Redis for TELEGRAM_FILE_PATH_TTL_SECONDS, which stays
+    below the one hour Telegram guarantees a download link to be valid.
+    """
+    key = _file_path_key(file_id)
+    if not refresh:
+        cached = await run_in_threadpool(_cached_file_path, key)
+        if cached:
+            return cached
+
+    get_file_url = f"{settings.TELEGRAM_API_URL}/bot{token}/getFile?file_id={file_id}"
+    print(f"Proxy: Fetching file path for {file_id}")
+    try:
+        resp = await client.get(get_file_url)
+        data = resp.json()
+    except Exception as e:
+        print(f"Proxy: Error fetching file path: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to contact Telegram API: {str(e)}")
+
+    if not data.get("ok"):
+        print(f"Proxy: Telegram error: {data.get('description')}")
+        raise HTTPException(status_code=404, detail="File not found on Telegram")
+
+    file_path = data["result"].get("file_path")
+    if not file_path:
+        raise HTTPException(status_code=404, detail="File path not found")
+
+    await run_in_threadpool(_store_file_path, key, file_path)
+    return file_path
+
+async def open_download(client: httpx.AsyncClient, token: str, file_path: str) -> httpx.Response:
+    download_url = f"{settings.TELEGRAM_API_URL}/file/bot{token}/{file_path}"
+    try:
+        return await client.send(client.build_request("GET", download_url), stream=True)
+    except httpx.HTTPError as e:
+        print(f"Proxy: Error opening download: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to contact Telegram API: {str(e)}")
+
 @router.get("/telegram/{file_id_with_ext}")
-async def proxy_telegram_file(file_id_with_ext: str, db: Session = Depends(get_db)):
+async def proxy_telegram_file(file_id_with_ext: str):
     """
     Proxies a Telegram file by streaming its content.
     Accepts extensions in URL (e.g. ID.mp4) for better frontend detection.
@@ -18,64 +85,70 @@ async def proxy_telegram_file(file_id_with_ext: str, db: Session = Depends(get_d
     # Extract real file_id (remove extension if present)
     file_id = file_id_with_ext.split('.')[0]
     
-    # Fetch settings from DB
-    tg_settings = get_telegram_settings(db)
-    token = tg_settings["bot_token"]
+    # Opens files and counts the hit in Redis; keep it off the loop
+    cached = await run_in_threadpool(media_cache.lookup, file_id)
+    if cached:
+        file, content_type = cached
+        return media_cache.CachedFileResponse(
+            file,
+            media_type=content_type,
+            headers={"Cache-Control": "public, max-age=3600"}
+        )
+
+    # Worker-local copy, no DB round trip per request
+    tg_settings = await get_cached_telegram_settings()
+    token = tg_settings.bot_token
     
     if not token:
         raise HTTPException(status_code=500, detail="Bot token not configured")
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # 1. Get file path from Telegram API
-        get_file_url = f"https://api.telegram.org/bot{token}/getFile?file_id={file_id}"
-        print(f"Proxy: Fetching file path for {file_id}")
+    client = get_http_client()
+    # 1. Get file path (cached) and open the download
+    file_path = await resolve_file_path(client, token, file_id)
+    upstream = await open_download(client, token, file_path)
+    if upstream.status_code in STALE_LINK_STATUSES:
+        # Cached path expired on Telegram's side; resolve it again once
+        print(f"Proxy: Download link for {file_id} expired, refreshing")
+        await upstream.aclose()
+        file_path = await resolve_file_path(client, token, file_id, refresh=True)
+        upstream = await open_download(client, token, file_path)
+    if upstream.status_code != 200:
+        await upstream.aclose()
+        raise HTTPException(status_code=502, detail=f"Telegram download failed: {upstream.status_code}")
+
+    # Detect content type
+    content_type = "application/octet-stream"
+    ext = os.path.splitext(file_path)[1].lower()
+    mime_types = {
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".png": "image/png",
+        ".gif": "image/gif",
+        ".mp4": "video/mp4",
+        ".mov": "video/quicktime",
+        ".webp": "image/webp"
+    }
+    content_type = mime_types.get(ext, "application/octet-stream")
+
+    async def stream_content():
+        # Write through to the disk cache; only complete downloads are kept
+        writer = media_cache.CacheWriter(file_id, content_type)
         try:
-            resp = await client.get(get_file_url)
-            data = resp.json()
+            async for chunk in upstream.aiter_bytes(chunk_size=8192):
+                await writer.write(chunk)
+                yield chunk
+            # Commit may scan the cache directory to evict; keep it off the loop
+            await run_in_threadpool(writer.commit)
+            print(f"Proxy: Finished streaming {file_id}")
         except Exception as e:
-            print(f"Proxy: Error fetching file path: {str(e)}")
-            raise HTTPException(status_code=502, detail=f"Failed to contact Telegram API: {str(e)}")
-
-        if not data.get("ok"):
-             print(f"Proxy: Telegram error: {data.get('description')}")
-             raise HTTPException(status_code=404, detail="File not found on Telegram")
-             
-        file_path = data["result"].get("file_path")
-        if not file_path:
-            raise HTTPException(status_code=404, detail="File path not found")
-
-        # 2. Construct download URL
-        download_url = f"https://api.telegram.org/file/bot{token}/{file_path}"
-        print(f"Proxy: Streaming from {download_url}")
-        
-        async def stream_content():
-            try:
-                # Use a larger timeout for streaming large files
-                async with httpx.AsyncClient(timeout=120.0) as stream_client:
-                    async with stream_client.stream("GET", download_url) as r:
-                        r.raise_for_status()
-                        async for chunk in r.aiter_bytes(chunk_size=8192):
-                            yield chunk
-                print(f"Proxy: Finished streaming {file_id}")
-            except Exception as e:
-                print(f"Proxy: Stream error for {file_id}: {str(e)}")
-
-        # Detect content type
-        content_type = "application/octet-stream"
-        ext = os.path.splitext(file_path)[1].lower()
-        mime_types = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".gif": "image/gif",
-            ".mp4": "video/mp4",
-            ".mov": "video/quicktime",
-            ".webp": "image/webp"
-        }
-        content_type = mime_types.get(ext, "application/octet-stream")
-
-        return StreamingResponse(
-            stream_content(), 
-            media_type=content_type,
-            headers={"Cache-Control": "public, max-age=3600"}
-        )
+            print(f"Proxy: Stream error for {file_id}: {str(e)}")
+        finally:
+            writer.discard()
+            # Returns the connection to the shared pool
+            await upstream.aclose()
+
+    return StreamingResponse(
+        stream_content(), 
+        media_type=content_type,
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
@@ -1,9 +1,16 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session, selectinload
 from app.db.session import get_db
 from app.models.review import Review as ReviewModel
 from app.schemas.review import Review, ReviewCreate, ReviewUpdate, ReviewPagination
+from app.api.pagination import paginate_keyset
+from app.api import bulk
+from app.api.export import export_response, parse_date
+from app.models.listing import Listing as ListingModel
+from app.schemas.bulk import BulkResult
+from app.db.counts import count_or_query
+from app.core.search import search_filter
 import math
 
 router = APIRouter()
@@ -16,10 +23,13 @@ def read_reviews(
     listing_id: int = None,
     start_date: str = None,
     end_date: str = None,
-    search: str = None
+    search: str = None,
+    pagination: str = "offset",
+    cursor: str = None,
+    with_total: bool = False
 ) -> Any:
-    skip = (page - 1) * size
-    query = db.query(ReviewModel).order_by(ReviewModel.created_at.desc())
+    # Items carry their listing; load them in one query instead of per row
+    query = db.query(ReviewModel).options(selectinload(ReviewModel.listing))
     
     if listing_id:
         query = query.filter(ReviewModel.listing_id == listing_id)
@@ -29,15 +39,27 @@ def read_reviews(
     if end_date:
         query = query.filter(ReviewModel.created_at <= end_date)
     
+    rank = None
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (ReviewModel.user_name.ilike(search_filter)) | 
-            (ReviewModel.comment.ilike(search_filter))
-        )
+        clause, rank = search_filter(ReviewModel, search)
+        query = query.filter(clause)
         
-    total = query.count()
-    reviews = query.offset(skip).limit(size).all()
+    def count():
+        if start_date or end_date or search:
+            return query.count()
+        return count_or_query(query, "review", {"listing_id": listing_id or None})
+
+    if pagination == "cursor" or cursor:
+        return paginate_keyset(
+            query, [ReviewModel.created_at, ReviewModel.id], size, cursor, with_total, count
+        )
+
+    skip = (page - 1) * size
+    total = count()
+    order = [ReviewModel.created_at.desc(), ReviewModel.id.desc()]
+    if rank is not None:
+        order.insert(0, rank.desc())
+    reviews = query.order_by(*order).offset(skip).limit(size).all()
     
     return {
         "items": reviews,
@@ -47,6 +69,67 @@ def read_reviews(
         "pages": math.ceil(total / size) if total > 0 else 0
     }
 
+@router.get("/export")
+def export_reviews(
+    format: str = "csv",
+    listing_id: int = None,
+    start_date: str = None,
+    end_date: str = None
+):
+    """
+    Streams all matching reviews as CSV or NDJSON in one response.
+    start_date/end_date filter on created_at.
+    """
+    start = parse_date(start_date, "start_date")
+    end = parse_date(end_date, "end_date")
+
+    def build_query(db: Session):
+        query = db.query(
+            ReviewModel.id,
+            ReviewModel.listing_id,
+            ListingModel.title.label("listing_title"),
+            ReviewModel.user_name,
+            ReviewModel.rating,
+            ReviewModel.comment,
+            ReviewModel.created_at,
+        ).outerjoin(ListingModel, ListingModel.id == ReviewModel.listing_id)
+        if listing_id:
+            query = query.filter(ReviewModel.listing_id == listing_id)
+        if start:
+            query = query.filter(ReviewModel.created_at >= start)
+        if end:
+            query = query.filter(ReviewModel.created_at <= end)
+        return query.order_by(ReviewModel.id)
+
+    return export_response("reviews", format, build_query)
+
+# Listing ratings and caches follow through the app.db.ratings listeners
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_reviews_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Creates reviews from a JSON array or NDJSON of ReviewCreate items.
+    """
+    return await bulk.process(
+        request, db, bulk.create_writer(ReviewModel, lambda p: p.model_dump()), ReviewCreate
+    )
+
+@router.put("/bulk", response_model=BulkResult)
+async def update_reviews_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Updates reviews; each item is {"id": ..., <fields to change>}.
+    """
+    return await bulk.process(
+        request, db, bulk.update_writer(ReviewModel), ReviewUpdate, require_id=True
+    )
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_reviews_bulk(request: Request, db: Session = Depends(get_db)) -> Any:
+    """
+    Deletes reviews by id; the body is a list of ids.
+    """
+    return await bulk.process(request, db, bulk.delete_writer(ReviewModel))
+
 @router.post("/", response_model=Review)
 def create_review(
     *,
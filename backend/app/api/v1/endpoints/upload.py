@@ -1,25 +1,27 @@
 from typing import Any, List
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
 import os
-import uuid
 import shutil
-import io
-from PIL import Image
-import pillow_heif
+import tempfile
 
+from app.core.config import settings
 from app.core.telegram_storage import upload_file_to_storage
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.core.db_settings import get_telegram_settings, env_settings
-
-from fastapi import Depends
-
-pillow_heif.register_heif_opener()
+from app.core import image_pool
+from app.core.db_settings import get_cached_telegram_settings
+from app.schemas.settings import TelegramSettings
 
 router = APIRouter()
 
 @router.post("/file")
-async def upload_file(request: Request, file: UploadFile = File(...), db: Session = Depends(get_db)) -> Any:
+async def upload_file(request: Request, file: UploadFile = File(...)) -> Any:
+    tg_settings = await get_cached_telegram_settings()
+    return await process_upload(request, file, tg_settings)
+
+async def process_upload(request: Request, file: UploadFile, tg_settings: TelegramSettings) -> dict:
     print(f"Received file: {file.filename}, content_type: {file.content_type}")
     
     # Validate file type (including iPhone formats)
@@ -32,42 +34,77 @@ async def upload_file(request: Request, file: UploadFile = File(...), db: Sessio
         print(f"Extension {file_ext} not in allowed list")
         raise HTTPException(status_code=400, detail=f"File extension '{file_ext}' not allowed. Allowed: {allowed_extensions}")
 
-    # Read file content
-    content = await file.read()
-    print(f"File size: {len(content)} bytes")
-    
-    # Handle HEIC conversion
-    if file_ext in [".heic", ".heif"]:
+    # Starlette has already spooled the part (to disk beyond 1 MB); never read it whole
+    size = file.size
+    if size is None:
+        size = await run_in_threadpool(_spooled_size, file.file)
+    print(f"File size: {size} bytes")
+    if size > settings.UPLOAD_MAX_FILE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {settings.UPLOAD_MAX_FILE_BYTES // (1024 * 1024)} MB limit"
+        )
+
+    with tempfile.TemporaryDirectory(prefix="dacha-upload-") as workdir:
+        source = file.file
+        source.seek(0)
+
+        # Handle HEIC conversion
+        if file_ext in [".heic", ".heif"]:
+            try:
+                print("Converting HEIC to JPG...")
+                src_path = os.path.join(workdir, f"source{file_ext}")
+                dst_path = os.path.join(workdir, "converted.jpg")
+                await run_in_threadpool(_copy_to_path, source, src_path)
+                # CPU-bound; runs in the image process pool, not on the event loop
+                await image_pool.run_conversion(src_path, dst_path)
+
+                source = open(dst_path, "rb")
+                size = os.path.getsize(dst_path)
+                base_name = os.path.splitext(file.filename)[0]
+                file.filename = f"{base_name}.jpg"
+                file_ext = ".jpg"
+                print("Conversion successful")
+            except HTTPException as e:
+                if e.status_code == 503:
+                    # Pool is saturated; let the client retry instead of piling up work
+                    raise
+                print(f"Conversion failed: {e.detail}")
+            except Exception as e:
+                print(f"Conversion failed: {e}")
+                # Proceed even if conversion failed, attempting upload of original
+                pass
+            source.seek(0)
+
         try:
-            print("Converting HEIC to JPG...")
-            image = Image.open(io.BytesIO(content))
-            image = image.convert("RGB")
-            
-            output = io.BytesIO()
-            image.save(output, format="JPEG", quality=85)
-            content = output.getvalue()
-            
-            base_name = os.path.splitext(file.filename)[0]
-            file.filename = f"{base_name}.jpg"
-            file_ext = ".jpg"
-            print("Conversion successful")
-        except Exception as e:
-            print(f"Conversion failed: {e}")
-            # Proceed even if conversion failed, attempting upload of original
-            pass
-
-    # Fetch settings from DB
-    tg_settings = get_telegram_settings(db)
+            return await _upload_to_storage(request, source, size, file.filename, file_ext, tg_settings)
+        finally:
+            if source is not file.file:
+                source.close()
+
+def _spooled_size(f) -> int:
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    return size
+
+def _copy_to_path(f, path: str) -> None:
+    with open(path, "wb") as out:
+        shutil.copyfileobj(f, out, settings.UPLOAD_CHUNK_BYTES)
+
+async def _upload_to_storage(request: Request, source, size: int, filename: str, file_ext: str, tg_settings: TelegramSettings) -> dict:
     # Upload strategy:
     # 1. Try generic storage (Telegram/Telegra.ph)
     # 2. If it returns a non-direct link (t.me) or fails, we cannot save locally per user request.
     
     try:
+        # Sent as a streamed multipart body, read from the file in chunks
         url = await upload_file_to_storage(
-            content, 
-            file.filename, 
-            bot_token=tg_settings["bot_token"], 
-            channel_id=tg_settings["channel_id"]
+            source,
+            filename,
+            size,
+            bot_token=tg_settings.bot_token,
+            channel_id=tg_settings.channel_id
         )
         print(f"Storage upload result: {url}")
         
@@ -80,16 +117,49 @@ async def upload_file(request: Request, file: UploadFile = File(...), db: Sessio
             base = str(request.base_url).rstrip('/')
             url = f"{base}{url}"
 
-        return {"url": url, "filename": file.filename}
+        return {"url": url, "filename": filename}
             
     except Exception as e:
         print(f"External upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @router.post("/files")
-async def upload_multiple_files(request: Request, files: List[UploadFile] = File(...), db: Session = Depends(get_db)) -> Any:
-    uploaded_files = []
-    for file in files:
-        res = await upload_file(request, file, db)
-        uploaded_files.append(res)
-    return uploaded_files
+async def upload_multiple_files(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    stream: bool = False
+) -> Any:
+    """
+    Uploads up to UPLOAD_CONCURRENCY files at a time. Results come back in
+    input order, with an "error" entry for files that failed. With
+    stream=true each result is sent as an NDJSON line (with its "index")
+    as soon as that file finishes.
+    """
+    tg_settings = await get_cached_telegram_settings()
+    semaphore = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+
+    async def upload_one(index: int, file: UploadFile) -> dict:
+        async with semaphore:
+            try:
+                result = await process_upload(request, file, tg_settings)
+            except HTTPException as e:
+                result = {"filename": file.filename, "error": e.detail}
+            except Exception as e:
+                result = {"filename": file.filename, "error": f"Upload failed: {str(e)}"}
+        return {"index": index, **result}
+
+    tasks = [asyncio.create_task(upload_one(i, f)) for i, f in enumerate(files)]
+
+    if stream:
+        async def stream_results():
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    yield json.dumps(await finished) + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+    results = await asyncio.gather(*tasks)
+    return [{k: v for k, v in r.items() if k != "index"} for r in results]
@@ -2,9 +2,12 @@ from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.core import security
+from app.core import security, principals
 from app.models.user import User as UserModel
 from app.schemas.user import User, UserCreate, UserUpdate, UserPagination
+from app.api.pagination import paginate_keyset
+from app.db.counts import count_or_query
+from app.core.search import search_filter
 import math
 
 router = APIRouter()
@@ -14,21 +17,30 @@ def read_users(
     db: Session = Depends(get_db),
     page: int = 1,
     size: int = 10,
-    search: str = None
+    search: str = None,
+    pagination: str = "offset",
+    cursor: str = None,
+    with_total: bool = False
 ) -> Any:
-    skip = (page - 1) * size
-    
-    query = db.query(UserModel).order_by(UserModel.id.desc())
+    query = db.query(UserModel)
     
+    rank = None
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (UserModel.full_name.ilike(search_filter)) | 
-            (UserModel.email.ilike(search_filter))
-        )
+        clause, rank = search_filter(UserModel, search)
+        query = query.filter(clause)
     
-    total = query.count()
-    users = query.offset(skip).limit(size).all()
+    def count():
+        if search:
+            return query.count()
+        return count_or_query(query, "user", {})
+
+    if pagination == "cursor" or cursor:
+        return paginate_keyset(query, [UserModel.id], size, cursor, with_total, count)
+
+    skip = (page - 1) * size
+    total = count()
+    order = [UserModel.id.desc()] if rank is None else [rank.desc(), UserModel.id.desc()]
+    users = query.order_by(*order).offset(skip).limit(size).all()
     
     return {
         "items": users,
@@ -50,6 +62,7 @@ def update_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     update_data = user_in.model_dump(exclude_unset=True)
+    password_changed = bool(update_data.get("password"))
     if update_data.get("password"):
         # Hash password in real app
         user.hashed_password = security.get_password_hash(update_data["password"])
@@ -61,6 +74,11 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    if password_changed:
+        # Sessions opened with the old password must not outlive it
+        principals.revoke_user_tokens(user.id)
+    else:
+        principals.invalidate(user.id)
     return user
 
 @router.delete("/{id}", response_model=User)
@@ -74,6 +92,7 @@ def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    principals.revoke_user_tokens(id)
     return user
 
 @router.post("/", response_model=User)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+CACHE_PREFIX = "cache"
+STATS_KEY = f"{CACHE_PREFIX}:stats"
+
+
+def _tag_key(tag: str) -> str:
+    return f"{CACHE_PREFIX}:tag:{tag}"
+
+
+def make_key(namespace: str, params: Dict[str, Any], versions: Iterable[str]) -> str:
+    """
+    Builds a cache key from the normalized query params and the current
+    version of every tag the entry depends on. Bumping a tag version makes
+    all keys built with the old version unreachable.
+    """
+    normalized = {k: v for k, v in sorted(params.items()) if v is not None}
+    digest = hashlib.sha1(
+        json.dumps(normalized, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"{CACHE_PREFIX}:{namespace}:{'.'.join(versions)}:{digest}"
+
+
+def record(namespace: str, outcome: str, count: int = 1) -> None:
+    try:
+        redis_client.hincrby(STATS_KEY, f"{namespace}:{outcome}", count)
+    except redis.RedisError:
+        pass
+
+
+def get_or_set(
+    namespace: str,
+    params: Dict[str, Any],
+    tags: Iterable[str],
+    loader: Callable[[], Any],
+    ttl: Optional[int] = None,
+) -> Any:
+    """
+    Returns the cached JSON value for (namespace, params) or calls loader,
+    stores its result and returns it. Redis errors fall back to the loader.
+    """
+    tags = list(tags)
+    try:
+        versions = redis_client.mget([_tag_key(t) for t in tags])
+        key = make_key(namespace, params, [v or "0" for v in versions])
+        raw = redis_client.get(key)
+    except redis.RedisError as e:
+        print(f"Cache: Redis unavailable, skipping cache: {e}")
+        return loader()
+
+    if raw is not None:
+        record(namespace, "hits")
+        return json.loads(raw)
+
+    record(namespace, "misses")
+    value = loader()
+    try:
+        redis_client.set(key, json.dumps(value), ex=ttl or settings.CACHE_TTL_SECONDS)
+    except redis.RedisError:
+        pass
+    return value
+
+
+def invalidate_tags(*tags: str) -> None:
+    """
+    Invalidates every cache entry that depends on one of the given tags.
+    """
+    try:
+        pipe = redis_client.pipeline()
+        for tag in tags:
+            pipe.incr(_tag_key(tag))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Cache: Failed to invalidate {tags}: {e}")
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    try:
+        raw = redis_client.hgetall(STATS_KEY)
+    except redis.RedisError:
+        raw = {}
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for field, value in raw.items():
+        namespace, outcome = field.rsplit(":", 1)
+        stats.setdefault(namespace, {"hits": 0, "misses": 0})[outcome] = int(value)
+
+    for entry in stats.values():
+        lookups = entry["hits"] + entry["misses"]
+        entry["hit_ratio"] = round(entry["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -1,15 +1,114 @@
+"""
+Runtime settings stored in the `settings` table.
+
+Hot paths (media proxy, uploads) read them from a per-worker in-memory
+copy that is loaded with one query on first use. Writes publish on a
+Redis channel and every worker drops its copy when it hears about it, so
+a change made through one gunicorn worker reaches all of them. Copies also
+expire after SETTINGS_CACHE_TTL_SECONDS in case a change message is lost.
+"""
+import asyncio
+import time
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.settings import Settings
 from app.core.config import settings as env_settings
+from app.core.redis_client import redis_client
+from app.schemas.settings import TelegramSettings
+
+TELEGRAM_KEYS = ["TELEGRAM_BOT_TOKEN", "TELEGRAM_CHANNEL_ID"]
+CHANGES_CHANNEL = "settings:changed"
+
+_telegram: Optional[TelegramSettings] = None
+_telegram_loaded_at = 0.0
+# Bumped on every invalidation; a load that sees it change was overtaken
+_generation = 0
+_load_lock = asyncio.Lock()
+
+def _to_telegram_settings(values: dict) -> TelegramSettings:
+    # A stored empty string overrides the env default on purpose
+    return TelegramSettings(
+        bot_token=values.get("TELEGRAM_BOT_TOKEN", env_settings.TELEGRAM_BOT_TOKEN),
+        channel_id=values.get("TELEGRAM_CHANNEL_ID", env_settings.TELEGRAM_CHANNEL_ID)
+    )
+
+def _telegram_query():
+    return select(Settings.key, Settings.value).where(Settings.key.in_(TELEGRAM_KEYS))
+
+def get_telegram_settings(db: Session) -> TelegramSettings:
+    return _to_telegram_settings(dict(db.execute(_telegram_query()).all()))
+
+async def get_telegram_settings_async(db: AsyncSession) -> TelegramSettings:
+    result = await db.execute(_telegram_query())
+    return _to_telegram_settings(dict(result.all()))
+
+def _fresh() -> bool:
+    return (
+        _telegram is not None
+        and time.monotonic() - _telegram_loaded_at < env_settings.SETTINGS_CACHE_TTL_SECONDS
+    )
+
+async def get_cached_telegram_settings() -> TelegramSettings:
+    """
+    Returns this worker's copy of the Telegram settings, loading it on
+    first use, after an invalidation or once it has expired.
+    """
+    global _telegram, _telegram_loaded_at
+    if _fresh():
+        return _telegram
+    from app.db.session import AsyncSessionLocal
+
+    async with _load_lock:
+        if _fresh():
+            return _telegram
+        generation = _generation
+        async with AsyncSessionLocal() as db:
+            loaded = await get_telegram_settings_async(db)
+        # Invalidated while the query ran: the row read may be stale, use
+        # it for this call only
+        if generation == _generation:
+            _telegram, _telegram_loaded_at = loaded, time.monotonic()
+    return loaded
+
+def invalidate_local_settings() -> None:
+    global _telegram, _generation
+    _telegram = None
+    _generation += 1
+
+def publish_settings_change() -> None:
+    invalidate_local_settings()
+    try:
+        redis_client.publish(CHANGES_CHANNEL, "telegram")
+    except redis.RedisError as e:
+        print(f"Settings: Failed to publish change: {e}")
 
-def get_telegram_settings(db: Session):
-    bot_token = db.query(Settings).filter(Settings.key == "TELEGRAM_BOT_TOKEN").first()
-    channel_id = db.query(Settings).filter(Settings.key == "TELEGRAM_CHANNEL_ID").first()
-    
-    return {
-        "bot_token": bot_token.value if bot_token else env_settings.TELEGRAM_BOT_TOKEN,
-        "channel_id": channel_id.value if channel_id else env_settings.TELEGRAM_CHANNEL_ID
-    }
+async def listen_for_settings_changes() -> None:
+    """
+    Long-running task (one per worker) that drops the local copy whenever
+    another worker publishes a change.
+    """
+    while True:
+        client = aioredis.from_url(env_settings.REDIS_URL, decode_responses=True)
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(CHANGES_CHANNEL)
+                # Changes published while we were not subscribed are lost
+                invalidate_local_settings()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        invalidate_local_settings()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Settings: Change listener failed, retrying: {e}")
+            await asyncio.sleep(5)
+        finally:
+            await client.aclose()
 
 def update_telegram_settings(db: Session, bot_token: str = None, channel_id: str = None):
     if bot_token is not None:
@@ -29,3 +128,4 @@ def update_telegram_settings(db: Session, bot_token: str = None, channel_id: str
             channel_setting.value = channel_id
             
     db.commit()
+    publish_settings_change()
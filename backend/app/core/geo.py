@@ -0,0 +1,158 @@
+"""
+Geo helpers for listing search: geohash encoding, radius/bounding-box
+filters and distance ordering.
+
+Two indexes back the queries, both available without PostGIS:
+- a GiST index on point(longitude, latitude), used by the bounding-box
+  containment (<@) that prefilters radius and viewport queries;
+- a btree index on the `geohash` column for cell lookups by prefix.
+  Geohash prefixes are also the grid cells that map clusters are
+  aggregated on.
+"""
+import math
+from typing import Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+BBox = Tuple[float, float, float, float]  # min_lng, min_lat, max_lng, max_lat
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def precision_for_zoom(zoom: int) -> int:
+    """
+    Geohash length whose cells are a few dozen pixels wide at a web map
+    zoom level (0 = whole world, 20 = building).
+    """
+    if zoom <= 2:
+        return 1
+    if zoom <= 4:
+        return 2
+    if zoom <= 7:
+        return 3
+    if zoom <= 9:
+        return 4
+    if zoom <= 12:
+        return 5
+    if zoom <= 14:
+        return 6
+    return 7
+
+
+def register_geohash(model: type) -> None:
+    """
+    Keeps model.geohash in sync with its latitude/longitude on every ORM write.
+    """
+    def fill(mapper, connection, target):
+        if target.latitude is None or target.longitude is None:
+            target.geohash = None
+        else:
+            target.geohash = encode_geohash(target.latitude, target.longitude)
+
+    event.listen(model, "before_insert", fill)
+    event.listen(model, "before_update", fill)
+
+
+def backfill_geohashes(db: Session) -> int:
+    """
+    Fills geohash for listings saved before the column existed.
+    """
+    from app.models.listing import Listing
+
+    rows = (
+        db.query(Listing)
+        .filter(Listing.geohash.is_(None), Listing.latitude.isnot(None), Listing.longitude.isnot(None))
+        .all()
+    )
+    for row in rows:
+        row.geohash = encode_geohash(row.latitude, row.longitude)
+    db.commit()
+    return len(rows)
+
+
+def validate_point(latitude: float, longitude: float) -> None:
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+
+
+def parse_bbox(value: str) -> BBox:
+    """
+    Parses "min_lng,min_lat,max_lng,max_lat" (the order map SDKs use).
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    validate_point(min_lat, min_lng)
+    validate_point(max_lat, max_lng)
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="bbox min values must not exceed max values")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    """
+    Smallest box containing the circle, used as the indexable prefilter.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(latitude))
+    dlng = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return (
+        max(longitude - dlng, -180.0), max(latitude - dlat, -90.0),
+        min(longitude + dlng, 180.0), min(latitude + dlat, 90.0),
+    )
+
+
+def point_expr(model: type):
+    # Must match the indexed expression exactly for the GiST index to apply
+    return func.point(model.longitude, model.latitude)
+
+
+def within_bbox(model: type, bbox: BBox):
+    min_lng, min_lat, max_lng, max_lat = bbox
+    box = func.box(func.point(min_lng, min_lat), func.point(max_lng, max_lat))
+    return point_expr(model).op("<@")(box)
+
+
+def distance_km(model: type, latitude: float, longitude: float):
+    """
+    Great-circle (haversine) distance from the given point, in km.
+    """
+    dlat = func.radians(model.latitude - latitude) / 2
+    dlng = func.radians(model.longitude - longitude) / 2
+    a = func.power(func.sin(dlat), 2) + (
+        math.cos(math.radians(latitude))
+        * func.cos(func.radians(model.latitude))
+        * func.power(func.sin(dlng), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
@@ -0,0 +1,81 @@
+"""
+Application-wide pooled HTTP client for Telegram and telegra.ph traffic.
+
+One AsyncClient is created in the FastAPI lifespan and reused by every
+outbound call, so TLS sessions and connections are kept alive between
+requests. Each upstream host gets its own HTTP/2 transport, which makes
+the connection limits per host.
+"""
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+UPSTREAM_HOSTS = (settings.TELEGRAM_API_URL, settings.TELEGRAPH_URL)
+
+_client: Optional[httpx.AsyncClient] = None
+_transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+
+
+def _make_transport() -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        retries=1,
+    )
+
+
+def _create_client() -> httpx.AsyncClient:
+    global _transports
+    _transports = {host: _make_transport() for host in UPSTREAM_HOSTS}
+    return httpx.AsyncClient(
+        http2=True,
+        mounts=dict(_transports),
+        # Reads are per chunk, so long video streams are fine with this
+        timeout=httpx.Timeout(connect=10.0, read=120.0, write=120.0, pool=10.0),
+    )
+
+
+async def start_http_client() -> None:
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client. Created lazily for code running outside
+    the app lifespan (scripts, tests).
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+def get_pool_stats() -> Dict[str, dict]:
+    stats = {}
+    for host, transport in _transports.items():
+        # httpx doesn't expose its httpcore pool publicly
+        pool = getattr(transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        stats[host] = {
+            "connections": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+            "available": sum(1 for c in connections if c.is_available()),
+            "http2": sum(1 for c in connections if "HTTP/2" in c.info()),
+            "max_connections": settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        }
+    return stats
@@ -0,0 +1,127 @@
+"""
+Process pool for CPU-heavy image transcoding (HEIC -> JPEG).
+
+Decoding an iPhone photo takes hundreds of milliseconds of pure CPU; doing
+it inline would stall every other request on the worker's event loop. Jobs
+run in a small ProcessPoolExecutor instead, with a cap on how many may be
+queued so a burst of uploads can't pile up unbounded work.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_stats = {"jobs": 0, "failed": 0, "rejected": 0, "wait_ms_total": 0.0, "convert_ms_total": 0.0}
+
+
+def _init_worker() -> None:
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+
+
+def convert_to_jpeg(src_path: str, dst_path: str, quality: int = 85) -> float:
+    """
+    Runs in a pool process. Reads and writes files rather than passing
+    image bytes between processes. Returns the conversion time in seconds.
+    """
+    from PIL import Image
+
+    started = time.perf_counter()
+    with Image.open(src_path) as image:
+        image.convert("RGB").save(dst_path, format="JPEG", quality=quality)
+    return time.perf_counter() - started
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def shutdown_image_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _release() -> None:
+    global _pending
+    _pending -= 1
+
+
+def _release_from(loop: asyncio.AbstractEventLoop) -> None:
+    # Done callbacks run on the executor's thread
+    try:
+        loop.call_soon_threadsafe(_release)
+    except RuntimeError:
+        pass  # loop already closed at shutdown
+
+
+async def run_conversion(src_path: str, dst_path: str) -> None:
+    """
+    Converts the image at src_path to a JPEG at dst_path in the pool.
+    Raises 503 when the queue is full and 504 when the job exceeds
+    IMAGE_JOB_TIMEOUT_SECONDS.
+    """
+    global _pending
+    if _pending >= settings.IMAGE_QUEUE_MAX:
+        _stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Image conversion queue is full, try again later")
+
+    _pending += 1
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    try:
+        future = _get_executor().submit(convert_to_jpeg, src_path, dst_path)
+    except Exception:
+        _release()
+        raise
+    # Freed when the process is really done: a timed-out job keeps running
+    # (cancel() can't stop it) and must keep holding its queue slot
+    future.add_done_callback(lambda _: _release_from(loop))
+    try:
+        convert_seconds = await asyncio.wait_for(
+            asyncio.wrap_future(future), timeout=settings.IMAGE_JOB_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        future.cancel()
+        _stats["failed"] += 1
+        raise HTTPException(status_code=504, detail="Image conversion timed out")
+    except Exception:
+        _stats["failed"] += 1
+        raise
+
+    total_ms = (time.perf_counter() - submitted) * 1000
+    convert_ms = convert_seconds * 1000
+    _stats["jobs"] += 1
+    _stats["wait_ms_total"] += total_ms - convert_ms
+    _stats["convert_ms_total"] += convert_ms
+    print(f"ImagePool: Converted in {convert_ms:.0f} ms (queued {total_ms - convert_ms:.0f} ms)")
+
+
+def get_stats() -> dict:
+    jobs = _stats["jobs"]
+    return {
+        "workers": settings.IMAGE_WORKERS,
+        "pending": _pending,
+        "queue_max": settings.IMAGE_QUEUE_MAX,
+        "jobs": jobs,
+        "failed": _stats["failed"],
+        "rejected": _stats["rejected"],
+        "avg_wait_ms": round(_stats["wait_ms_total"] / jobs, 1) if jobs else 0.0,
+        "avg_convert_ms": round(_stats["convert_ms_total"] / jobs, 1) if jobs else 0.0,
+    }
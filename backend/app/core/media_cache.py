@@ -0,0 +1,234 @@
+"""
+Size-bounded on-disk LRU cache for proxied Telegram media, keyed by file_id.
+
+Entries are written through while the first download streams to the
+client and served as plain files afterwards. Recency is tracked with the
+file mtime (touched on every hit), so all workers sharing the directory
+share one LRU order; eviction removes the least recently used files until
+the cache is back under its byte budget.
+"""
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, StreamingResponse
+
+from app.core import cache
+from app.core.config import settings
+
+STATS_NAMESPACE = "media"
+# Leave some headroom after eviction so we don't evict on every write
+EVICT_TO_RATIO = 0.9
+RESCAN_EVERY_WRITES = 100
+# Downloaded chunks are small; write them to disk in batches of this size
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+_total_bytes: Optional[int] = None
+_writes_since_scan = 0
+
+
+def _entry_path(file_id: str) -> str:
+    digest = hashlib.sha256(file_id.encode()).hexdigest()
+    return os.path.join(settings.MEDIA_CACHE_DIR, digest[:2], digest)
+
+
+def _type_path(path: str) -> str:
+    return f"{path}.type"
+
+
+def lookup(file_id: str) -> Optional[Tuple[BinaryIO, str]]:
+    """
+    Returns (open file, content_type) of a cached entry and marks it as
+    recently used, or None on a miss. The entry is opened here so that an
+    eviction in another worker can't remove it before it is sent: an
+    unlinked file stays readable through an open handle. Blocking (file
+    I/O and the Redis hit counter): call it from the threadpool.
+    """
+    path = _entry_path(file_id)
+    try:
+        with open(_type_path(path)) as f:
+            content_type = f.read().strip()
+        file = open(path, "rb")
+    except OSError:
+        cache.record(STATS_NAMESPACE, "misses")
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass  # evicted meanwhile; the open handle still serves it
+    cache.record(STATS_NAMESPACE, "hits")
+    return file, content_type
+
+
+class CachedFileResponse(FileResponse):
+    """
+    FileResponse (ranges, pathsend/zero-copy where the server supports it)
+    over an entry lookup() opened. The path is served as usual if it still
+    exists when the response starts; if another worker evicted it since the
+    lookup, the whole file is streamed from the handle opened at lookup.
+    """
+
+    def __init__(self, file: BinaryIO, media_type: str, headers: Optional[dict] = None):
+        super().__init__(file.name, media_type=media_type, headers=headers, stat_result=os.fstat(file.fileno()))
+        self._file = file
+
+    def _path_present(self) -> bool:
+        try:
+            os.stat(self.path)
+        except OSError:
+            return False
+        self._file.close()
+        return True
+
+    async def _read_handle(self):
+        while True:
+            chunk = await run_in_threadpool(self._file.read, self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    async def __call__(self, scope, receive, send):
+        if await run_in_threadpool(self._path_present):
+            await super().__call__(scope, receive, send)
+            return
+        try:
+            await StreamingResponse(self._read_handle(), headers=self.headers)(scope, receive, send)
+        finally:
+            self._file.close()
+
+
+class CacheWriter:
+    """
+    Spools a download into a temp file next to its final location and
+    publishes it atomically on commit(). Anything not committed is removed.
+    Chunks are buffered and written in the threadpool, off the event loop.
+    """
+
+    def __init__(self, file_id: str, content_type: str):
+        self.path = _entry_path(file_id)
+        self.content_type = content_type
+        self.size = 0
+        self._file = None
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".part")
+            self._file = os.fdopen(fd, "wb")
+        except OSError as e:
+            print(f"MediaCache: Cannot write to cache: {e}")
+
+    async def write(self, chunk: bytes) -> None:
+        if self._file is None:
+            return
+        self.size += len(chunk)
+        if self.size > settings.MEDIA_CACHE_MAX_ENTRY_BYTES:
+            self.discard()
+            return
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= WRITE_BUFFER_BYTES:
+            try:
+                await run_in_threadpool(self._flush)
+            except OSError as e:
+                print(f"MediaCache: Failed to write entry: {e}")
+                self.discard()
+
+    def _flush(self) -> None:
+        self._file.write(b"".join(self._buffer))
+        self._buffer.clear()
+        self._buffered = 0
+
+    def commit(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._flush()
+            self._file.close()
+            self._file = None
+            with open(_type_path(self.path), "w") as f:
+                f.write(self.content_type)
+            os.replace(self._tmp_path, self.path)
+        except OSError as e:
+            print(f"MediaCache: Failed to store entry: {e}")
+            self.discard()
+            return
+        _account(self.size)
+
+    def discard(self) -> None:
+        if self._file is None:
+            return
+        self._buffer.clear()
+        self._file.close()
+        self._file = None
+        try:
+            os.unlink(self._tmp_path)
+        except OSError:
+            pass
+
+
+def _scan():
+    entries = []
+    for root, _, files in os.walk(settings.MEDIA_CACHE_DIR):
+        for name in files:
+            if name.endswith((".type", ".part")):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def _account(size: int) -> None:
+    global _total_bytes, _writes_since_scan
+    _writes_since_scan += 1
+    if _total_bytes is None or _writes_since_scan >= RESCAN_EVERY_WRITES:
+        # Other workers write to the same directory; resync periodically
+        _total_bytes = sum(size for _, size, _ in _scan())
+        _writes_since_scan = 0
+    else:
+        _total_bytes += size
+    if _total_bytes > settings.MEDIA_CACHE_MAX_BYTES:
+        evict()
+
+
+def evict() -> int:
+    """
+    Removes least recently used entries until the cache fits its budget.
+    Returns the number of bytes freed.
+    """
+    global _total_bytes
+    entries = sorted(_scan())
+    total = sum(size for _, size, _ in entries)
+    target = settings.MEDIA_CACHE_MAX_BYTES * EVICT_TO_RATIO
+    freed = removed = 0
+    for _, size, path in entries:
+        if total - freed <= target:
+            break
+        try:
+            os.unlink(path)
+            removed += 1
+            freed += size
+            os.unlink(_type_path(path))
+        except OSError:
+            pass
+    _total_bytes = total - freed
+    if removed:
+        cache.record(STATS_NAMESPACE, "evictions", removed)
+    if freed:
+        print(f"MediaCache: Evicted {removed} files, {freed} bytes")
+    return freed
+
+
+def get_usage() -> dict:
+    entries = _scan()
+    return {
+        "files": len(entries),
+        "bytes": sum(size for _, size, _ in entries),
+        "max_bytes": settings.MEDIA_CACHE_MAX_BYTES,
+    }
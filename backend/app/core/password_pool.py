@@ -0,0 +1,117 @@
+"""
+Dedicated executor for bcrypt hashing and verification.
+
+bcrypt is deliberately slow (~250 ms of CPU per call at 12 rounds). Run
+on the shared threadpool, a login burst would take the threads that sync
+read endpoints need. Password work goes through a small, separate pool
+instead; bcrypt releases the GIL, so threads are enough. The number of
+waiting jobs is capped so a storm fails fast with 503 instead of queueing
+for minutes.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_pending = 0
+_stats = {"jobs": 0, "failed": 0, "rejected": 0, "wait_ms_total": 0.0, "run_ms_total": 0.0, "max_pending": 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password"
+                )
+    return _executor
+
+
+def shutdown_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _reserve() -> None:
+    global _pending
+    with _lock:
+        if _pending >= settings.PASSWORD_QUEUE_MAX:
+            _stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Too many login attempts in progress, try again later")
+        _pending += 1
+        _stats["max_pending"] = max(_stats["max_pending"], _pending)
+
+
+def _timed(fn: Callable, submitted: float, *args) -> Any:
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        finished = time.perf_counter()
+        with _lock:
+            _stats["wait_ms_total"] += (started - submitted) * 1000
+            _stats["run_ms_total"] += (finished - started) * 1000
+
+
+def _release(failed: bool) -> None:
+    global _pending
+    with _lock:
+        _pending -= 1
+        _stats["jobs"] += 1
+        if failed:
+            _stats["failed"] += 1
+
+
+async def run(fn: Callable, *args) -> Any:
+    """
+    Runs fn(*args) on the password pool without blocking the event loop.
+    """
+    _reserve()
+    failed = True
+    try:
+        future = _get_executor().submit(_timed, fn, time.perf_counter(), *args)
+        result = await asyncio.wrap_future(future)
+        failed = False
+        return result
+    finally:
+        _release(failed)
+
+
+def call(fn: Callable, *args) -> Any:
+    """
+    Blocking variant of run() for sync endpoints and scripts.
+    """
+    _reserve()
+    failed = True
+    try:
+        result = _get_executor().submit(_timed, fn, time.perf_counter(), *args).result()
+        failed = False
+        return result
+    finally:
+        _release(failed)
+
+
+def get_stats() -> dict:
+    with _lock:
+        jobs = _stats["jobs"]
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "pending": _pending,
+            "max_pending": _stats["max_pending"],
+            "queue_max": settings.PASSWORD_QUEUE_MAX,
+            "jobs": jobs,
+            "failed": _stats["failed"],
+            "rejected": _stats["rejected"],
+            "avg_wait_ms": round(_stats["wait_ms_total"] / jobs, 1) if jobs else 0.0,
+            "avg_run_ms": round(_stats["run_ms_total"] / jobs, 1) if jobs else 0.0,
+        }
@@ -0,0 +1,118 @@
+"""
+Redis-backed cache of authenticated users and the token revocation list.
+
+get_current_user resolves a token with a single MGET: the cached
+principal, the token's revocation marker and the user's "revoked before"
+timestamp. The DB is only hit when the principal is not cached.
+
+Revocations live only in Redis. While it is unavailable they can't be
+checked and tokens are rejected, unless AUTH_REVOCATION_FAIL_OPEN accepts
+them unchecked.
+"""
+import time
+from typing import Optional, Tuple
+
+import redis
+
+from app.core import cache
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.schemas.user import Principal
+
+STATS_NAMESPACE = "principal"
+
+
+def _principal_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+def _revoked_token_key(jti: str) -> str:
+    return f"auth:revoked:{jti}"
+
+
+def _revoked_before_key(user_id: int) -> str:
+    return f"auth:revoked_before:{user_id}"
+
+
+def lookup(
+    user_id: int, jti: Optional[str], issued_at: Optional[float]
+) -> Tuple[Optional[Principal], Optional[bool]]:
+    """
+    Returns (cached principal or None, revoked). On Redis errors the
+    principal is a cache miss and revoked is None (unknown), or False
+    with AUTH_REVOCATION_FAIL_OPEN.
+    """
+    keys = [_principal_key(user_id), _revoked_before_key(user_id)]
+    if jti:
+        keys.append(_revoked_token_key(jti))
+    try:
+        values = redis_client.mget(keys)
+    except redis.RedisError as e:
+        print(f"Principals: Redis unavailable, can't check revocations: {e}")
+        return None, (False if settings.AUTH_REVOCATION_FAIL_OPEN else None)
+
+    raw, revoked_before = values[0], values[1]
+    revoked = len(values) > 2 and values[2] is not None
+    if revoked_before is not None and (issued_at or 0) < float(revoked_before):
+        revoked = True
+
+    if raw is None:
+        cache.record(STATS_NAMESPACE, "misses")
+        return None, revoked
+    cache.record(STATS_NAMESPACE, "hits")
+    return Principal.model_validate_json(raw), revoked
+
+
+def store(principal: Principal) -> None:
+    try:
+        redis_client.set(
+            _principal_key(principal.id),
+            principal.model_dump_json(),
+            ex=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+    except redis.RedisError:
+        pass
+
+
+def invalidate(user_id: int) -> None:
+    try:
+        redis_client.delete(_principal_key(user_id))
+    except redis.RedisError as e:
+        print(f"Principals: Failed to invalidate user {user_id}: {e}")
+
+
+def revoke_token(jti: str, expires_at: Optional[float]) -> bool:
+    """
+    Revokes one token until it would have expired anyway. Returns False
+    if Redis is unavailable and the token was not revoked.
+    """
+    ttl = int((expires_at or 0) - time.time()) + 1
+    if ttl <= 0:
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    try:
+        redis_client.set(_revoked_token_key(jti), "1", ex=ttl)
+    except redis.RedisError as e:
+        print(f"Principals: Failed to revoke token {jti}: {e}")
+        return False
+    return True
+
+
+def revoke_user_tokens(user_id: int) -> bool:
+    """
+    Revokes every token issued to the user so far and drops the cached
+    principal. Kept for as long as a token can live. Returns False if
+    Redis is unavailable and nothing was revoked.
+    """
+    pipe = redis_client.pipeline()
+    pipe.set(
+        _revoked_before_key(user_id),
+        str(time.time()),
+        ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+    pipe.delete(_principal_key(user_id))
+    try:
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Principals: Failed to revoke tokens of user {user_id}: {e}")
+        return False
+    return True
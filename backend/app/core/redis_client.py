@@ -1,7 +1,14 @@
 import redis
 from app.core.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Timeouts so an unreachable Redis fails the call (callers fall back)
+# instead of hanging the thread that made it
+redis_client = redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+)
 
 def get_redis():
     return redis_client
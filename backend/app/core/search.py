@@ -0,0 +1,138 @@
+"""
+Full-text and fuzzy search over Uzbek (Latin and Cyrillic), Russian and
+English text.
+
+Searchable models get a `search_document` column, filled on every write
+with the lowercased text of their searchable fields plus its
+transliteration into the other script, and a generated `search_vector`
+tsvector over it. Queries are matched by prefix against the tsvector and
+by substring/word similarity against the trigram-indexed document, so a
+Latin query finds Cyrillic text and vice versa.
+"""
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, func, literal, or_
+from sqlalchemy.orm import Session
+
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(search_document, '')) || "
+    "to_tsvector('russian', coalesce(search_document, '')) || "
+    "to_tsvector('english', coalesce(search_document, ''))"
+)
+
+APOSTROPHES = "'ʻʼ‘’`"
+
+# Uzbek Latin -> Cyrillic, digraphs first
+LATIN_TO_CYRILLIC = [
+    ("o'", "ў"), ("g'", "ғ"), ("sh", "ш"), ("ch", "ч"),
+    ("yo", "ё"), ("yu", "ю"), ("ya", "я"),
+    ("a", "а"), ("b", "б"), ("d", "д"), ("e", "е"), ("f", "ф"), ("g", "г"),
+    ("h", "ҳ"), ("i", "и"), ("j", "ж"), ("k", "к"), ("l", "л"), ("m", "м"),
+    ("n", "н"), ("o", "о"), ("p", "п"), ("q", "қ"), ("r", "р"), ("s", "с"),
+    ("t", "т"), ("u", "у"), ("v", "в"), ("x", "х"), ("y", "й"), ("z", "з"),
+    ("c", "к"), ("w", "в"),
+]
+
+# Uzbek and Russian Cyrillic -> Uzbek Latin
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g'", "д": "d", "е": "e",
+    "ё": "yo", "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q",
+    "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s",
+    "т": "t", "у": "u", "ў": "o'", "ф": "f", "х": "x", "ҳ": "h", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e",
+    "ю": "yu", "я": "ya",
+}
+
+_LATIN_PATTERN = re.compile("|".join(re.escape(src) for src, _ in LATIN_TO_CYRILLIC))
+_LATIN_MAP = dict(LATIN_TO_CYRILLIC)
+_WORD = re.compile(r"\w+")
+
+# model -> searchable field names
+SEARCH_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def _unify_apostrophes(text: str) -> str:
+    for ch in APOSTROPHES[1:]:
+        text = text.replace(ch, "'")
+    return text
+
+
+def to_cyrillic(text: str) -> str:
+    return _LATIN_PATTERN.sub(lambda m: _LATIN_MAP[m.group(0)], _unify_apostrophes(text.lower()))
+
+
+def to_latin(text: str) -> str:
+    return "".join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in text.lower())
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercases and drops apostrophes, so "O'rikzor", "Oʻrikzor" and
+    "orikzor" all match each other.
+    """
+    text = _unify_apostrophes(text.lower())
+    return re.sub(r"\s+", " ", text.replace("'", "")).strip()
+
+
+def build_document(*values: Optional[str]) -> str:
+    text = " ".join(v for v in values if v)
+    parts = dict.fromkeys(
+        (normalize(text), normalize(to_latin(text)), normalize(to_cyrillic(text)))
+    )
+    return " ".join(part for part in parts if part)
+
+
+def register_search_document(model: type, fields: Iterable[str]) -> None:
+    """
+    Keeps model.search_document in sync with `fields` on every ORM write.
+    """
+    SEARCH_FIELDS[model] = tuple(fields)
+
+    def fill(mapper, connection, target):
+        target.search_document = build_document(*(getattr(target, f) for f in SEARCH_FIELDS[model]))
+
+    event.listen(model, "before_insert", fill)
+    event.listen(model, "before_update", fill)
+
+
+def search_filter(model: type, term: str):
+    """
+    Returns (where clause, rank expression) for a user search term.
+    Every branch of the clause is served by the GIN tsvector or trigram
+    index on the model.
+    """
+    q = normalize(term)
+    tokens = _WORD.findall(q)
+    conditions = [
+        model.search_document.contains(q, autoescape=True),
+        literal(q).op("<%")(model.search_document),
+    ]
+    rank = func.word_similarity(q, model.search_document)
+    if tokens:
+        prefix_query = " & ".join(f"{t}:*" for t in tokens)
+        tsquery = (
+            func.to_tsquery("simple", prefix_query)
+            .op("||")(func.to_tsquery("russian", prefix_query))
+            .op("||")(func.to_tsquery("english", prefix_query))
+        )
+        conditions.insert(0, model.search_vector.op("@@")(tsquery))
+        rank = rank + func.ts_rank_cd(model.search_vector, tsquery)
+    return or_(*conditions), rank
+
+
+def backfill_search_documents(db: Session, batch_size: int = 500) -> int:
+    """
+    Fills search_document for rows written before it existed.
+    """
+    updated = 0
+    for model, fields in SEARCH_FIELDS.items():
+        while True:
+            rows = db.query(model).filter(model.search_document.is_(None)).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                row.search_document = build_document(*(getattr(row, f) for f in fields))
+            db.commit()
+            updated += len(rows)
+    return updated
@@ -1,10 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
+import hmac
+import time
+import uuid
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core import password_pool
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below BCRYPT_ROUNDS verify but are flagged for rehashing
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
@@ -15,20 +25,33 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # jti identifies the token for revocation, iat is compared against a
+    # user's "revoked before" timestamp
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex, "iat": time.time()}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Handle legacy plain text passwords
-    if hashed_password == plain_password:
-        return True
-    # If the password in DB is not a valid hash, verify() might raise an error or return False.
-    # We should handle the case where hashed_password is plain text but verify thinks it's a hash (unlikely for short strings).
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and returns (valid, new_hash). new_hash is set when
+    the stored value should be replaced: legacy plain text or a hash that
+    is weaker than the current policy. CPU-heavy; call it through
+    app.core.password_pool.
+    """
+    if not hashed_password:
+        return False, None
+    if pwd_context.identify(hashed_password, required=False) is None:
+        # Legacy plain text password, accepted once and upgraded
+        if hmac.compare_digest(plain_password.encode(), hashed_password.encode()):
+            return True, pwd_context.hash(plain_password)
+        return False, None
     try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception:
-        return False
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        return False, None
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.call(pwd_context.hash, password)
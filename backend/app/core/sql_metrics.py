@@ -0,0 +1,143 @@
+"""
+Per-request SQL statistics.
+
+Cursor events on both engines (sync, and the asyncpg one behind async
+endpoints) add every statement to the stats of the request being served,
+kept in a context variable so it follows the request into threadpool
+endpoints and dependencies. Work outside a request (startup, background
+tasks) is not counted.
+
+When the response finishes, a request is logged if it ran more than
+SQL_MAX_QUERIES_PER_REQUEST statements, spent more than
+SQL_SLOW_REQUEST_MS in the database, or repeated one statement shape
+SQL_N_PLUS_ONE_THRESHOLD times or more (the usual N+1: a lazy load or a
+per-row lookup inside a loop). With DEBUG on, the numbers are also sent
+as X-DB-* and Server-Timing response headers. Queries made while a
+streaming body is sent come after the headers and only show in the log.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.session import async_engine, engine
+
+_current: ContextVar[Optional["RequestStats"]] = ContextVar("sql_request_stats", default=None)
+
+# Bound parameters (psycopg2 and asyncpg style) and inlined literals
+_VALUES = re.compile(r"%\(\w+\)s|\$\d+(?:::\w+)?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Expanded IN lists differ in length per call; keep one placeholder
+_IN_LISTS = re.compile(r"IN \((?:\?, )*\?\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """
+    Statement shape: parameters, literals and IN lists replaced and
+    whitespace collapsed.
+    """
+    statement = _VALUES.sub("?", statement)
+    statement = _IN_LISTS.sub("IN (?)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str = ""
+    shapes: Counter = field(default_factory=Counter)
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds, self.slowest_statement = seconds, statement
+        self.shapes[normalize(statement)] += 1
+
+    def repeated(self):
+        """
+        (shape, count) of the most repeated statement if it reaches the
+        N+1 threshold, else None.
+        """
+        if not self.shapes:
+            return None
+        shape, count = self.shapes.most_common(1)[0]
+        return (shape, count) if count >= settings.SQL_N_PLUS_ONE_THRESHOLD else None
+
+    def headers(self):
+        ms = self.seconds * 1000
+        headers = [
+            (b"x-db-query-count", str(self.queries).encode()),
+            (b"x-db-time-ms", f"{ms:.1f}".encode()),
+            (b"x-db-slowest-ms", f"{self.slowest_seconds * 1000:.1f}".encode()),
+            (b"server-timing", f'db;dur={ms:.1f};desc="{self.queries} queries"'.encode()),
+        ]
+        repeated = self.repeated()
+        if repeated:
+            headers.append((b"x-db-n-plus-one", str(repeated[1]).encode()))
+        return headers
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._sql_metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_sql_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.add(statement, time.perf_counter() - started)
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _shorten(statement: str, limit: int = 300) -> str:
+    statement = _SPACES.sub(" ", statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def _report(method: str, path: str, stats: RequestStats) -> None:
+    ms = stats.seconds * 1000
+    repeated = stats.repeated()
+    if repeated:
+        print(f"SQL: possible N+1 in {method} {path}: {repeated[1]}x {_shorten(repeated[0])}")
+    if stats.queries > settings.SQL_MAX_QUERIES_PER_REQUEST or ms > settings.SQL_SLOW_REQUEST_MS:
+        print(
+            f"SQL: {method} {path} ran {stats.queries} queries in {ms:.1f} ms, "
+            f"slowest {stats.slowest_seconds * 1000:.1f} ms: {_shorten(stats.slowest_statement)}"
+        )
+
+
+class SQLMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                message["headers"] = list(message.get("headers", [])) + stats.headers()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            _report(scope["method"], scope["path"], stats)
@@ -1,11 +1,64 @@
-import httpx
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, BinaryIO
+import httpx
+import mimetypes
 import os
+import secrets
+
+def _remaining(file: BinaryIO) -> int:
+    start = file.tell()
+    end = file.seek(0, os.SEEK_END)
+    file.seek(start)
+    return end - start
+
+async def _read_chunks(file: BinaryIO, size: int) -> AsyncIterator[bytes]:
+    while size > 0:
+        chunk = await run_in_threadpool(file.read, min(settings.UPLOAD_CHUNK_BYTES, size))
+        if not chunk:
+            raise OSError("Upload file is shorter than expected")
+        size -= len(chunk)
+        yield chunk
+
+async def _post_multipart(url: str, fields: dict, name: str, filename: str, file: BinaryIO) -> httpx.Response:
+    """
+    POSTs `fields` and the file (from its current position) as a
+    multipart/form-data body. The file is read in the threadpool chunk by
+    chunk while it is sent; httpx would read a sync file on the event loop.
+    """
+    boundary = secrets.token_hex(16)
+    quoted = filename.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    head = "".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'
+        for key, value in fields.items()
+    )
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{quoted}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    )
+    head, tail = head.encode(), f"\r\n--{boundary}--\r\n".encode()
+    size = await run_in_threadpool(_remaining, file)
+
+    async def body():
+        yield head
+        async for chunk in _read_chunks(file, size):
+            yield chunk
+        yield tail
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + size + len(tail)),
+    }
+    return await get_http_client().post(url, content=body(), headers=headers)
 
-async def upload_to_telegram(file_content: bytes, filename: str, bot_token: str = None, channel_id: str = None) -> str:
+async def upload_to_telegram(file: BinaryIO, filename: str, bot_token: str = None, channel_id: str = None) -> str:
     """
     Uploads a file to a Telegram channel and returns the message link or file_id.
+    The file is streamed from its current position in chunks, never read whole,
+    and read in the threadpool (see _post_multipart).
     """
     token = bot_token or settings.TELEGRAM_BOT_TOKEN
     chat_id = channel_id or settings.TELEGRAM_CHANNEL_ID
@@ -13,76 +66,72 @@ async def upload_to_telegram(file_content: bytes, filename: str, bot_token: str
     if not token or not chat_id:
         raise HTTPException(status_code=500, detail="Telegram Bot settings not configured")
 
-    url = f"https://api.telegram.org/bot{token}/sendDocument"
+    url = f"{settings.TELEGRAM_API_URL}/bot{token}/sendDocument"
     
-    async with httpx.AsyncClient() as client:
-        files = {'document': (filename, file_content)}
-        data = {'chat_id': chat_id}
-        
-        response = await client.post(url, data=data, files=files)
-        res_data = response.json()
-        
-        if not res_data.get("ok"):
-            raise HTTPException(status_code=500, detail=f"Telegram upload failed: {res_data.get('description')}")
-        
-        # Extract file_id to use with a proxy
-        # The document object is inside res_data["result"]["document"]
-        doc = res_data["result"].get("document")
-        video = res_data["result"].get("video")
-        photo = res_data["result"].get("photo")
+    response = await _post_multipart(url, {'chat_id': chat_id}, 'document', filename, file)
+    res_data = response.json()
+    
+    if not res_data.get("ok"):
+        raise HTTPException(status_code=500, detail=f"Telegram upload failed: {res_data.get('description')}")
+    
+    # Extract file_id to use with a proxy
+    # The document object is inside res_data["result"]["document"]
+    doc = res_data["result"].get("document")
+    video = res_data["result"].get("video")
+    photo = res_data["result"].get("photo")
+    
+    file_id = ""
+    if doc:
+        file_id = doc.get("file_id")
+    elif video:
+        file_id = video.get("file_id")
+    elif photo:
+        # Photo is a list of sizes, get the last one (largest)
+        file_id = photo[-1].get("file_id")
         
-        file_id = ""
-        if doc:
-            file_id = doc.get("file_id")
-        elif video:
-            file_id = video.get("file_id")
-        elif photo:
-            # Photo is a list of sizes, get the last one (largest)
-            file_id = photo[-1].get("file_id")
-            
-        if not file_id:
-            # Fallback for other types if structure differs
-            # Attempt to find any file_id recursively or just fail gracefully
-             message_id = res_data["result"]["message_id"]
-             return f"https://t.me/{str(chat_id).replace('@', '')}/{message_id}"
+    if not file_id:
+        # Fallback for other types if structure differs
+        # Attempt to find any file_id recursively or just fail gracefully
+         message_id = res_data["result"]["message_id"]
+         return f"https://t.me/{str(chat_id).replace('@', '')}/{message_id}"
 
-        # Return a proxy URL that our backend will handle
-        # We assume the backend is running on localhost:8000 (or request.base_url in real app)
-        # But here we return a relative path or a known base. 
-        # Better to return a special prefix we can detect.
-        return f"/api/v1/proxy/telegram/{file_id}"
+    # Return a proxy URL that our backend will handle
+    # We assume the backend is running on localhost:8000 (or request.base_url in real app)
+    # But here we return a relative path or a known base. 
+    # Better to return a special prefix we can detect.
+    return f"/api/v1/proxy/telegram/{file_id}"
 
-async def upload_to_telegraph(file_content: bytes) -> str:
+async def upload_to_telegraph(file: BinaryIO) -> str:
     """
     Uploads an image/video to telegra.ph and returns a direct permanent link.
     Limit: 5MB
     """
-    url = "https://telegra.ph/upload"
+    url = f"{settings.TELEGRAPH_URL}/upload"
     
-    async with httpx.AsyncClient() as client:
-        files = {'file': ('file', file_content)}
-        response = await client.post(url, files=files)
-        res_data = response.json()
-        
-        if isinstance(res_data, list) and len(res_data) > 0:
-            path = res_data[0].get("src")
-            return f"https://telegra.ph{path}"
-        else:
-            raise HTTPException(status_code=500, detail="Telegra.ph upload failed")
+    response = await _post_multipart(url, {}, 'file', 'file', file)
+    res_data = response.json()
+    
+    if isinstance(res_data, list) and len(res_data) > 0:
+        path = res_data[0].get("src")
+        return f"{settings.TELEGRAPH_URL}{path}"
+    else:
+        raise HTTPException(status_code=500, detail="Telegra.ph upload failed")
 
-async def upload_file_to_storage(file_content: bytes, filename: str, bot_token: str = None, channel_id: str = None) -> str:
+async def upload_file_to_storage(file: BinaryIO, filename: str, size: int, bot_token: str = None, channel_id: str = None) -> str:
     """
     Main utility to choose the best storage.
     For images and small videos, telegra.ph is best for direct URLs.
     """
     ext = os.path.splitext(filename)[1].lower()
+    start = file.tell()
     
     # Telegra.ph supports jpg, jpeg, png, gif, mp4
-    if ext in [".jpg", ".jpeg", ".png", ".gif", ".mp4"] and len(file_content) < 5 * 1024 * 1024:
+    if ext in [".jpg", ".jpeg", ".png", ".gif", ".mp4"] and size < 5 * 1024 * 1024:
         try:
-            return await upload_to_telegraph(file_content)
+            return await upload_to_telegraph(file)
         except:
             # Fallback to Telegram if telegra.ph fails
-            return await upload_to_telegram(file_content, filename, bot_token, channel_id)
+            file.seek(start)
+            return await upload_to_telegram(file, filename, bot_token, channel_id)
     else:
-        return await upload_to_telegram(file_content, filename, bot_token, channel_id)
+        return await upload_to_telegram(file, filename, bot_token, channel_id)
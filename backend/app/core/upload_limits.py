@@ -0,0 +1,99 @@
+"""
+Request body size limit for the upload endpoints.
+
+Runs as plain ASGI middleware so oversized uploads are rejected from the
+Content-Length header, or as soon as the received bytes pass the limit,
+instead of after the whole body has been spooled.
+
+Multipart bodies are also run through a streaming parser that only counts
+bytes per part, so a single file over UPLOAD_MAX_FILE_BYTES is rejected
+while it is received instead of after Starlette has spooled it to disk.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+UPLOAD_PATH_PREFIX = "/api/v1/upload"
+
+
+def _too_large(limit: int) -> str:
+    return f"Upload exceeds the {limit // (1024 * 1024)} MB limit"
+
+
+def _file_too_large(limit: int) -> str:
+    return f"File exceeds the {limit // (1024 * 1024)} MB limit"
+
+
+def _part_size_checker(content_type: Optional[bytes], limit: int) -> Optional[MultipartParser]:
+    """
+    Parser that raises 413 once any part of the body passes `limit`
+    bytes, or None for bodies that aren't multipart.
+    """
+    if not content_type:
+        return None
+    media_type, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        return None
+    part_bytes = 0
+
+    def on_part_begin():
+        nonlocal part_bytes
+        part_bytes = 0
+
+    def on_part_data(data: bytes, start: int, end: int):
+        nonlocal part_bytes
+        part_bytes += end - start
+        if part_bytes > limit:
+            raise HTTPException(status_code=413, detail=_file_too_large(limit))
+
+    return MultipartParser(boundary, {"on_part_begin": on_part_begin, "on_part_data": on_part_data})
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int = None, max_file_bytes: int = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(UPLOAD_PATH_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_bytes or settings.UPLOAD_MAX_REQUEST_BYTES
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": _too_large(limit)}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        parts = _part_size_checker(
+            headers.get(b"content-type"), self.max_file_bytes or settings.UPLOAD_MAX_FILE_BYTES
+        )
+
+        async def limited_receive():
+            nonlocal received, parts
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > limit:
+                    # Chunked bodies have no Content-Length; stop reading here
+                    raise HTTPException(status_code=413, detail=_too_large(limit))
+                if parts is not None:
+                    try:
+                        parts.write(body)
+                    except FormParserError:
+                        # Malformed body: stop counting, Starlette's parser reports it
+                        parts = None
+            return message
+
+        await self.app(scope, limited_receive, send)
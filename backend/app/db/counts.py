@@ -0,0 +1,251 @@
+"""
+Row counts per (table, filter dimension), kept in Redis.
+
+Committed ORM writes adjust the counters incrementally, so paginated
+endpoints can answer `total` without a COUNT(*). Writes that bypass the
+ORM unit of work (bulk UPDATE/DELETE, raw SQL, lost Redis updates) cause
+drift, which `reconcile_counts` corrects by recounting with GROUP BY.
+"""
+import asyncio
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.models.booking import Booking
+from app.models.listing import Listing
+from app.models.review import Review
+from app.models.user import User
+
+COUNTS_PREFIX = "counts"
+RECONCILE_LOCK_KEY = f"{COUNTS_PREFIX}:reconcile:lock"
+
+# table -> (model, dimensions). Every dimension is a tuple of columns whose
+# combined values get their own counter; () is the unfiltered total.
+COUNTED = {
+    "listing": (Listing, [(), ("region",), ("status",), ("region", "status")]),
+    "booking": (Booking, [(), ("status",)]),
+    "review": (Review, [(), ("listing_id",)]),
+    "user": (User, [()]),
+}
+_TABLE_BY_MODEL = {model: table for table, (model, _) in COUNTED.items()}
+
+_PENDING_KEY = "pending_count_deltas"
+_MISSING = object()
+
+
+def dimension_key(values: Dict[str, Any]) -> str:
+    return "&".join(f"{k}={v}" for k, v in sorted(values.items()))
+
+
+def _hash_key(table: str) -> str:
+    return f"{COUNTS_PREFIX}:{table}"
+
+
+def _keys_for(table: str, values: Dict[str, Any]):
+    _, dimensions = COUNTED[table]
+    for dims in dimensions:
+        yield dimension_key({d: values[d] for d in dims})
+
+
+def _tracked_columns(table: str):
+    _, dimensions = COUNTED[table]
+    return {c for dims in dimensions for c in dims}
+
+
+def _current_values(state, columns, default=_MISSING) -> Optional[Dict[str, Any]]:
+    values = {}
+    for col in columns:
+        value = state.dict.get(col, default)
+        if value is _MISSING:
+            return None
+        values[col] = value
+    return values
+
+
+def _previous_values(state, columns) -> Optional[Dict[str, Any]]:
+    values = {}
+    for col in columns:
+        history = state.attrs[col].history
+        if history.deleted:
+            values[col] = history.deleted[0]
+        elif history.unchanged:
+            values[col] = history.unchanged[0]
+        elif not history.added and col in state.dict:
+            values[col] = state.dict[col]
+        else:
+            # Old value was never loaded; leave it to reconciliation
+            return None
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_deltas(session: Session, flush_context) -> None:
+    deltas: Counter = session.info.setdefault(_PENDING_KEY, Counter())
+
+    for obj in session.new:
+        table = _TABLE_BY_MODEL.get(type(obj))
+        if table:
+            # Columns never set on a new object were inserted as NULL
+            values = _current_values(inspect(obj), _tracked_columns(table), default=None)
+            for key in _keys_for(table, values):
+                deltas[(table, key)] += 1
+
+    for obj in session.deleted:
+        table = _TABLE_BY_MODEL.get(type(obj))
+        if table:
+            values = _previous_values(inspect(obj), _tracked_columns(table))
+            for key in _keys_for(table, values) if values else ():
+                deltas[(table, key)] -= 1
+
+    for obj in session.dirty:
+        table = _TABLE_BY_MODEL.get(type(obj))
+        if not table or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        columns = _tracked_columns(table)
+        if not any(state.attrs[c].history.added for c in columns):
+            continue
+        old = _previous_values(state, columns)
+        new = _current_values(state, columns)
+        if old is None or new is None:
+            continue
+        for key in _keys_for(table, old):
+            deltas[(table, key)] -= 1
+        for key in _keys_for(table, new):
+            deltas[(table, key)] += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_deltas(session: Session) -> None:
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        apply_deltas(deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_deltas(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def change_deltas(table: str, old: Dict[str, Any], new: Dict[str, Any]) -> Counter:
+    """
+    Counter deltas for one row whose tracked columns changed from `old`
+    to `new`, for writes that bypass the ORM (e.g. a bulk UPDATE). Both
+    dicts must hold every tracked column of the table.
+    """
+    deltas: Counter = Counter()
+    for key in _keys_for(table, old):
+        deltas[(table, key)] -= 1
+    for key in _keys_for(table, new):
+        deltas[(table, key)] += 1
+    return deltas
+
+
+def apply_deltas(deltas: Dict[Tuple[str, str], int]) -> None:
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for (table, key), delta in deltas.items():
+            if delta:
+                pipe.hincrby(_hash_key(table), key, delta)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Counts: Failed to apply deltas, will be fixed on reconcile: {e}")
+
+
+def get_count(table: str, filters: Dict[str, Any]) -> Optional[int]:
+    """
+    Returns the maintained count for the given equality filters, or None
+    if that combination isn't tracked or hasn't been counted yet.
+    """
+    filters = {k: v for k, v in filters.items() if v is not None}
+    _, dimensions = COUNTED[table]
+    if tuple(sorted(filters)) not in {tuple(sorted(d)) for d in dimensions}:
+        return None
+    try:
+        value = redis_client.hget(_hash_key(table), dimension_key(filters))
+    except redis.RedisError:
+        return None
+    return int(value) if value is not None else None
+
+
+def count_or_query(query, table: str, filters: Dict[str, Any]) -> int:
+    total = get_count(table, filters)
+    if total is None:
+        total = query.count()
+    return total
+
+
+def reconcile_counts(db: Session) -> Dict[str, int]:
+    """
+    Recounts every tracked dimension and corrects the Redis counters.
+
+    Counters are read just before the database snapshot the recount runs
+    on, and each one is moved by (recounted - read) with HINCRBY rather
+    than overwritten, so increments from writes committed while the
+    GROUP BYs run are kept.
+    """
+    current = {table: redis_client.hgetall(_hash_key(table)) for table in COUNTED}
+    fresh = {table: {} for table in COUNTED}
+    # One snapshot for every GROUP BY, taken right after the read above
+    with db.get_bind().connect() as conn:
+        conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            for table, (model, dimensions) in COUNTED.items():
+                for dims in dimensions:
+                    columns = [getattr(model, d) for d in dims]
+                    rows = conn.execute(select(*columns, func.count()).select_from(model).group_by(*columns))
+                    for row in rows:
+                        *values, n = row
+                        fresh[table][dimension_key(dict(zip(dims, values)))] = n
+
+    summary = {}
+    pipe = redis_client.pipeline(transaction=False)
+    for table in COUNTED:
+        for key in set(fresh[table]) | set(current[table]):
+            delta = fresh[table].get(key, 0) - int(current[table].get(key, 0))
+            if delta:
+                pipe.hincrby(_hash_key(table), key, delta)
+        summary[table] = len(fresh[table])
+    pipe.execute()
+    return summary
+
+
+async def run_periodic_reconcile() -> None:
+    """
+    Background loop started with the app. The Redis lock makes sure only
+    one worker reconciles per interval.
+    """
+    from app.db.session import SessionLocal
+
+    interval = settings.COUNTS_RECONCILE_INTERVAL_SECONDS
+
+    def reconcile():
+        if not redis_client.set(RECONCILE_LOCK_KEY, "1", nx=True, ex=max(interval - 1, 1)):
+            return None
+        db = SessionLocal()
+        try:
+            return reconcile_counts(db)
+        finally:
+            db.close()
+
+    while True:
+        try:
+            summary = await run_in_threadpool(reconcile)
+            if summary is not None:
+                print(f"Counts: Reconciled {summary}")
+        except Exception as e:
+            print(f"Counts: Reconcile failed: {e}")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    print(reconcile_counts(db))
+    db.close()
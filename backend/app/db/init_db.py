@@ -1,29 +1,19 @@
 from sqlalchemy.orm import Session
-from app.db.base import Base
-from app.db.session import engine
+from app.db.migrations import check_schema_version
 from app.models.listing import Listing
 from app.models.user import User
 from app.models.amenity import Amenity
+from app.core.search import backfill_search_documents
+from app.core import security
+from app.core.geo import backfill_geohashes
+from app.db.ratings import recompute_ratings
 
 def init_db(db: Session) -> None:
-    # Create tables
-    print("Creating tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created.")
-
-    # Manual migration for missing columns (since we don't use Alembic)
-    from sqlalchemy import text
-    try:
-        with engine.connect() as conn:
-            # Check if google_maps_url exists in listing table
-            # This is specific to PostgreSQL
-            conn.execute(text("ALTER TABLE listing ADD COLUMN IF NOT EXISTS google_maps_url VARCHAR"))
-            conn.execute(text("ALTER TABLE listing ADD COLUMN IF NOT EXISTS latitude FLOAT"))
-            conn.execute(text("ALTER TABLE listing ADD COLUMN IF NOT EXISTS longitude FLOAT"))
-            conn.commit()
-            print("Successfully checked/added map columns.")
-    except Exception as e:
-        print(f"Migration error (might be okay if column exists): {e}")
+    """
+    Seeds reference data and runs the data backfills. The schema itself
+    is managed by Alembic: run `alembic upgrade head` first.
+    """
+    check_schema_version()
 
     # Seed Amenities if empty
     if db.query(Amenity).count() == 0:
@@ -178,7 +168,7 @@ def init_db(db: Session) -> None:
         admin = User(
             email="admin@dacha.uz",
             full_name="Super Admin",
-            hashed_password="admin", # placeholder
+            hashed_password=security.get_password_hash("admin"),
             role="admin",
             status="active"
         )
@@ -189,6 +179,17 @@ def init_db(db: Session) -> None:
         
     db.commit()
 
+    print(f"Search documents backfilled: {backfill_search_documents(db)}")
+    print(f"Geohashes backfilled: {backfill_geohashes(db)}")
+    print(f"Listing ratings recomputed: {recompute_ratings(db)}")
+
+    # Seed/refresh the maintained row counters
+    from app.db.counts import reconcile_counts
+    try:
+        print(f"Reconciled row counts: {reconcile_counts(db)}")
+    except Exception as e:
+        print(f"Could not reconcile row counts: {e}")
+
 if __name__ == "__main__":
     from app.db.session import SessionLocal
     db = SessionLocal()
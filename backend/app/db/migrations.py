@@ -0,0 +1,73 @@
+"""
+Alembic helpers shared by the migration scripts and the app.
+
+The schema is owned by the migration chain in backend/alembic; it is
+applied with `alembic upgrade head` as a separate deploy step. App
+startup only compares the database's alembic_version with the head of
+the chain, so it never waits on (or takes locks for) DDL.
+"""
+import os
+from typing import Optional, Sequence
+
+from alembic import op
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from app.db.session import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+
+def _script_directory() -> ScriptDirectory:
+    return ScriptDirectory.from_config(Config(os.path.abspath(ALEMBIC_INI)))
+
+
+def head_revision() -> Optional[str]:
+    return _script_directory().get_current_head()
+
+
+def current_revision() -> Optional[str]:
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def check_schema_version() -> None:
+    """
+    Raises RuntimeError unless the database is at the head revision.
+    Reads only the alembic_version table.
+    """
+    current, head = current_revision(), head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. "
+            "Run `alembic upgrade head` before starting the app."
+        )
+    print(f"Migrations: Schema at head revision {head}")
+
+
+# Used from inside migration scripts
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence, **kw) -> None:
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS, outside the migration's
+    transaction: writes to the table continue while the index builds. A
+    build that failed earlier leaves an INVALID index behind, which IF NOT
+    EXISTS would keep, so that one is dropped and rebuilt.
+    """
+    with op.get_context().autocommit_block():
+        invalid = op.get_bind().execute(text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            print(f"Migrations: Rebuilding invalid index {name}")
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,206 @@
+"""
+Checks that every list endpoint's page query is served by an index.
+
+Each case calls the endpoint code against the configured database and
+records the SELECTs it runs, then EXPLAINs them with enable_seqscan and
+enable_sort off. The planner then only picks a Seq Scan or Sort when no
+index can serve the query. Any such node fails the check, as does a scan
+that discards many rows per row it returns (e.g. walking the primary key
+backwards for ORDER BY id DESC and skipping other statuses). Discarded
+rows are counted with EXPLAIN ANALYZE, since filtering on a value most
+rows have is a fine plan, so the check needs realistic data (production
+or benchmarks.datagen) and refuses to run while any checked table has
+fewer than MIN_TABLE_ROWS rows: on a near-empty table every scan passes.
+
+Cases cover keyset (cursor) and offset pages. Totals are not checked:
+they come from the Redis counters (app.db.counts), and their COUNT(*)
+fallback reads every matching row by design. Searches ranked by
+relevance and radius searches ordered by distance sort on a computed
+value by design and are not covered either.
+
+    python -m app.db.query_plans
+"""
+import json
+import re
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.api.pagination import encode_cursor
+
+# Plan nodes that mean an index could not serve the query
+BAD_NODES = ("Seq Scan", "Sort", "Incremental Sort")
+# Filters allowed to remain after an index condition: excluding one row
+# by primary key (ensure_available's exclude_id)
+RESIDUAL_FILTERS = (re.compile(r"^\(id <> \S+\)$"),)
+# Query.count(), the fallback for list totals
+COUNT_STATEMENT = re.compile(r"^SELECT count\(\*\) AS count_1\s+FROM \(", re.IGNORECASE)
+# Offset cases read this page, so OFFSET skips index entries too
+OFFSET_PAGE = 5
+# Rows a filtered scan may discard per row it returns
+MAX_DISCARDED_PER_ROW = 10
+# Fewer rows than this in a checked table and the result means nothing
+MIN_TABLE_ROWS = 500
+CHECKED_TABLES = ("listing", "booking", "review", "user")
+
+
+def _cases() -> List[Tuple[str, Callable[[Session], None]]]:
+    # Imported here: endpoint modules pull in the whole app
+    from app.api.v1.endpoints import bookings, listings, reviews, users
+
+    def list_listings(**kw):
+        def run(db: Session):
+            args = dict(page=1, size=10, region=None, search=None, status="active",
+                        use_cursor=True, cursor=None, with_total=False)
+            args.update(kw)
+            listings._query_listings(db, **args)
+        return run
+
+    def list_bookings(**kw):
+        def run(db: Session):
+            args = dict(page=1, size=10, status=None, pagination="cursor", cursor=None, with_total=False)
+            args.update(kw)
+            bookings.read_bookings(db=db, **args)
+        return run
+
+    def list_reviews(**kw):
+        def run(db: Session):
+            args = dict(page=1, size=10, listing_id=None, start_date=None, end_date=None,
+                        search=None, pagination="cursor", cursor=None, with_total=False)
+            args.update(kw)
+            reviews.read_reviews(db=db, **args)
+        return run
+
+    def check_availability(db: Session):
+        bookings.ensure_available(db, 1, datetime(2026, 7, 1), datetime(2026, 7, 5), exclude_id=1)
+
+    def list_users(**kw):
+        def run(db: Session):
+            args = dict(page=1, size=10, search=None, pagination="cursor", cursor=None, with_total=False)
+            args.update(kw)
+            users.read_users(db=db, **args)
+        return run
+
+    id_cursor = encode_cursor([1000], "next")
+    review_cursor = encode_cursor([datetime(2026, 7, 1), 1000], "next")
+    offset_listings = dict(use_cursor=False, page=OFFSET_PAGE)
+    offset = dict(pagination="offset", page=OFFSET_PAGE)
+    return [
+        ("listings: status", list_listings()),
+        ("listings: status, next page", list_listings(cursor=id_cursor)),
+        ("listings: region + status", list_listings(region="zomin")),
+        ("listings: all statuses", list_listings(status="all")),
+        ("listings: sort=rating", list_listings(sort="rating")),
+        ("listings: sort=rating, next page", list_listings(sort="rating", cursor=encode_cursor([4.5, 1000], "next"))),
+        ("bookings: all", list_bookings()),
+        ("bookings: status", list_bookings(status="pending")),
+        ("bookings: status, next page", list_bookings(status="pending", cursor=id_cursor)),
+        ("bookings: availability check", check_availability),
+        ("reviews: all", list_reviews()),
+        ("reviews: all, next page", list_reviews(cursor=review_cursor)),
+        ("reviews: listing", list_reviews(listing_id=1)),
+        ("reviews: listing, next page", list_reviews(listing_id=1, cursor=review_cursor)),
+        ("users: all", list_users()),
+        # Offset pages: the default for every list endpoint
+        ("listings: status, offset", list_listings(**offset_listings)),
+        ("listings: region + status, offset", list_listings(region="zomin", **offset_listings)),
+        ("listings: all statuses, offset", list_listings(status="all", **offset_listings)),
+        ("listings: sort=rating, offset", list_listings(sort="rating", **offset_listings)),
+        ("bookings: all, offset", list_bookings(**offset)),
+        ("bookings: status, offset", list_bookings(status="pending", **offset)),
+        ("reviews: all, offset", list_reviews(**offset)),
+        ("reviews: listing, offset", list_reviews(listing_id=1, **offset)),
+        ("users: all, offset", list_users(**offset)),
+    ]
+
+
+def _bad_nodes(plan: dict) -> List[str]:
+    found = []
+    if plan["Node Type"] in BAD_NODES:
+        found.append(f'{plan["Node Type"]} on {plan.get("Relation Name") or plan.get("Sort Key")}')
+    elif plan["Node Type"].endswith("Scan") and "Filter" in plan:
+        removed, returned = plan.get("Rows Removed by Filter", 0), plan.get("Actual Rows", 0)
+        wasteful = removed > MAX_DISCARDED_PER_ROW * max(returned, 1)
+        if wasteful and not any(r.match(plan["Filter"]) for r in RESIDUAL_FILTERS):
+            found.append(f'Filter {plan["Filter"]} on {plan.get("Index Name") or plan.get("Relation Name")}')
+    for child in plan.get("Plans", []):
+        found.extend(_bad_nodes(child))
+    return found
+
+
+def _small_tables(db: Session) -> List[str]:
+    small = []
+    for table in CHECKED_TABLES:
+        rows = db.execute(
+            text(f'SELECT count(*) FROM (SELECT 1 FROM "{table}" LIMIT :n) AS t'), {"n": MIN_TABLE_ROWS}
+        ).scalar()
+        if rows < MIN_TABLE_ROWS:
+            small.append(f"{table} ({rows} rows)")
+    return small
+
+
+def check_query_plans(db: Session) -> List[Tuple[str, List[str]]]:
+    """
+    Returns (case, problems) per case; problems is empty when every
+    statement of the case is index-served. Nothing is written: the
+    session is rolled back at the end. Raises RuntimeError when a checked
+    table has fewer than MIN_TABLE_ROWS rows.
+    """
+    small = _small_tables(db)
+    if small:
+        raise RuntimeError(
+            f"Query plans can't be judged on near-empty tables: {', '.join(small)} "
+            f"(need {MIN_TABLE_ROWS}); load data with python -m benchmarks.datagen"
+        )
+    results = []
+    try:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        db.execute(text("SET LOCAL enable_sort = off"))
+        conn = db.connection()
+        for name, run in _cases():
+            statements = []
+
+            def record(conn, cursor, statement, parameters, context, executemany):
+                statement = statement.lstrip()
+                if statement.upper().startswith("SELECT") and not COUNT_STATEMENT.match(statement):
+                    statements.append((statement, parameters))
+
+            event.listen(conn, "before_cursor_execute", record)
+            try:
+                run(db)
+            finally:
+                event.remove(conn, "before_cursor_execute", record)
+
+            problems = []
+            for statement, parameters in statements:
+                plan = conn.exec_driver_sql("EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                problems.extend(_bad_nodes(plan[0]["Plan"]))
+            if not statements:
+                problems.append("no query recorded")
+            results.append((name, problems))
+    finally:
+        db.rollback()
+    return results
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        results = check_query_plans(db)
+    except RuntimeError as e:
+        sys.exit(f"QueryPlans: {e}")
+    finally:
+        db.close()
+    failed = 0
+    for name, problems in results:
+        print(f"{'FAIL' if problems else 'ok':4}  {name}" + (f": {', '.join(problems)}" if problems else ""))
+        failed += bool(problems)
+    print(f"{len(results) - failed}/{len(results)} query plans index-served")
+    sys.exit(1 if failed else 0)
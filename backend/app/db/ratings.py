@@ -0,0 +1,152 @@
+"""
+Listing.rating / reviews_count maintained from review writes.
+
+Each flush that inserts, updates or deletes reviews adds its rating
+deltas to the listing's running `rating_sum` and `reviews_count` with a
+single UPDATE per listing, on the same connection and transaction as the
+review write. `rating` is derived from the two in that UPDATE, so no
+write ever rescans a listing's reviews. `recompute_ratings` rebuilds all
+three from scratch for data written before (or around) this.
+"""
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import Numeric, case, cast, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.models.listing import Listing
+from app.models.review import Review
+
+_AFFECTED_KEY = "rating_affected_listings"
+
+
+def _rating_expr(rating_sum, reviews_count):
+    return case(
+        (reviews_count > 0, func.round(cast(rating_sum, Numeric) / reviews_count, 2)),
+        else_=0.0,
+    )
+
+
+def _old_values(state):
+    """
+    (listing_id, rating) as they were before this flush.
+    """
+    values = []
+    for col in ("listing_id", "rating"):
+        history = state.attrs[col].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(state.dict.get(col))
+    return tuple(values)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_review_deltas(session: Session, flush_context) -> None:
+    # listing_id -> [rating_sum delta, reviews_count delta]
+    deltas: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+
+    for obj in session.new:
+        if isinstance(obj, Review) and obj.listing_id is not None:
+            deltas[obj.listing_id][0] += obj.rating or 0
+            deltas[obj.listing_id][1] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Review):
+            listing_id, rating = _old_values(inspect(obj))
+            if listing_id is not None:
+                deltas[listing_id][0] -= rating or 0
+                deltas[listing_id][1] -= 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Review) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not (state.attrs.rating.history.added or state.attrs.listing_id.history.added):
+            continue
+        old_listing, old_rating = _old_values(state)
+        if old_listing is not None:
+            deltas[old_listing][0] -= old_rating or 0
+            deltas[old_listing][1] -= 1
+        if obj.listing_id is not None:
+            deltas[obj.listing_id][0] += obj.rating or 0
+            deltas[obj.listing_id][1] += 1
+
+    deltas = {k: v for k, v in deltas.items() if v != [0, 0]}
+    if not deltas:
+        return
+
+    connection = session.connection()
+    for listing_id, (sum_delta, count_delta) in deltas.items():
+        new_sum = func.coalesce(Listing.rating_sum, 0) + sum_delta
+        new_count = func.coalesce(Listing.reviews_count, 0) + count_delta
+        connection.execute(
+            update(Listing)
+            .where(Listing.id == listing_id)
+            .values(rating_sum=new_sum, reviews_count=new_count, rating=_rating_expr(new_sum, new_count))
+        )
+
+    # Loaded listings now hold stale aggregates
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Listing) and obj.id in deltas:
+            session.expire(obj, ["rating", "rating_sum", "reviews_count"])
+
+    session.info.setdefault(_AFFECTED_KEY, set()).update(deltas)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_listing_cache(session: Session) -> None:
+    affected = session.info.pop(_AFFECTED_KEY, None)
+    if affected:
+        cache.invalidate_tags("listings", *(f"listing:{i}" for i in affected))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_affected(session: Session, previous_transaction) -> None:
+    session.info.pop(_AFFECTED_KEY, None)
+
+
+def recompute_ratings(db: Session) -> int:
+    """
+    Rebuilds rating_sum, reviews_count and rating of every listing from
+    its reviews. Returns the number of listings updated.
+    """
+    totals = (
+        select(
+            Review.listing_id,
+            func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+            func.count(Review.id).label("reviews_count"),
+        )
+        .group_by(Review.listing_id)
+        .subquery()
+    )
+    new_sum = func.coalesce(totals.c.rating_sum, 0)
+    new_count = func.coalesce(totals.c.reviews_count, 0)
+    fresh = (
+        select(Listing.id, new_sum.label("rating_sum"), new_count.label("reviews_count"))
+        .outerjoin(totals, totals.c.listing_id == Listing.id)
+        .subquery()
+    )
+    ids = db.execute(
+        update(Listing)
+        .where(Listing.id == fresh.c.id)
+        .values(
+            rating_sum=fresh.c.rating_sum,
+            reviews_count=fresh.c.reviews_count,
+            rating=_rating_expr(fresh.c.rating_sum, fresh.c.reviews_count),
+        )
+        .returning(Listing.id)
+    ).scalars().all()
+    db.commit()
+    cache.invalidate_tags("listings", *(f"listing:{i}" for i in ids))
+    return len(ids)
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    print(f"Ratings: Recomputed {recompute_ratings(db)} listings")
+    db.close()
@@ -1,15 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 from fastapi.staticfiles import StaticFiles
 import os
 from app.api.v1.api import api_router
+from app.db.counts import run_periodic_reconcile
+from app.db.migrations import check_schema_version
+import app.db.ratings  # noqa: registers the review -> listing rating listeners
+from app.core.http_client import start_http_client, close_http_client
+from app.core.image_pool import shutdown_image_pool
+from app.core.password_pool import shutdown_password_pool
+from app.core.db_settings import listen_for_settings_changes
+from app.core.upload_limits import UploadSizeLimitMiddleware
+from app.core.sql_metrics import SQLMetricsMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Migrations run as their own deploy step; only verify the version here
+    await run_in_threadpool(check_schema_version)
+    await start_http_client()
+    reconcile_task = asyncio.create_task(run_periodic_reconcile())
+    settings_listener = asyncio.create_task(listen_for_settings_changes())
+    yield
+    reconcile_task.cancel()
+    settings_listener.cancel()
+    await close_http_client()
+    shutdown_image_pool()
+    shutdown_password_pool()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"/api/v1/openapi.json"
+    openapi_url=f"/api/v1/openapi.json",
+    lifespan=lifespan
 )
 
+# Added before CORS so 413 responses still carry CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Set all CORS enabled origins
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +57,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so its numbers cover everything the request runs
+app.add_middleware(SQLMetricsMiddleware)
+
 app.include_router(api_router, prefix="/api/v1")
 
 # Uploads directory static mount removed as we now use external storage
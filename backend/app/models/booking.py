@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, String, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -19,3 +20,22 @@ class Booking(Base):
     
     user = relationship("User", backref="bookings")
     listing = relationship("Listing", backref="bookings")
+
+    __table_args__ = (
+        # No two non-cancelled bookings of a listing may overlap (needs btree_gist)
+        ExcludeConstraint(
+            (listing_id, "="),
+            (func.tsrange(check_in, check_out), "&&"),
+            name="booking_no_overlap",
+            using="gist",
+            where=text("status <> 'cancelled'"),
+        ),
+        # Admin list filtered by status, newest first
+        Index("ix_booking_status_id", "status", id.desc()),
+        # Availability checks (ensure_available, has_overlaps) only look at
+        # live bookings of one listing
+        Index(
+            "ix_booking_listing_id_check_in", "listing_id", "check_in", "check_out",
+            postgresql_where=text("status <> 'cancelled'"),
+        ),
+    )
@@ -1,29 +1,63 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, Text, DateTime
+from sqlalchemy import Column, Integer, String, Float, JSON, Text, DateTime, Computed, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.base_class import Base
+from app.core.search import SEARCH_VECTOR_SQL, register_search_document
+from app.core.geo import GEOHASH_PRECISION, register_geohash
 
 class Listing(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    region = Column(String, index=True)
+    region = Column(String)
     location = Column(String)
     price_per_night = Column(Float)
+    # Maintained from review writes by app.db.ratings
     rating = Column(Float, default=0.0)
     reviews_count = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
     guests_max = Column(Integer)
     rooms = Column(Integer)
     beds = Column(Integer)
     baths = Column(Integer)
-    amenities = Column(JSON) # e.g. {"pool": true, "wifi": true}
+    amenities = Column(JSONB) # e.g. {"pool": true, "wifi": true}
     images = Column(JSON) # List of image URLs
     video_url = Column(String, nullable=True) # URL of a video file
     description = Column(Text)
     google_maps_url = Column(String, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    # Maintained by app.core.geo from latitude/longitude
+    geohash = Column(String(GEOHASH_PRECISION), nullable=True)
     status = Column(String, default="active") # 'active' or 'inactive'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Maintained by app.core.search; never returned by the API
+    search_document = deferred(Column(Text))
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
     reviews = relationship("Review", back_populates="listing", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_listing_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_listing_search_document_trgm", "search_document",
+            postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"}
+        ),
+        # amenities @> '{"pool": true}' filters
+        Index("ix_listing_amenities", "amenities", postgresql_using="gin", postgresql_ops={"amenities": "jsonb_path_ops"}),
+        # Default list order (newest first) within a status, with and
+        # without a region; also the leading columns of the region counters
+        Index("ix_listing_status_id", "status", id.desc()),
+        Index("ix_listing_region_status_id", "region", "status", id.desc()),
+        # sort=rating, usually within one status
+        Index("ix_listing_status_rating_id", "status", rating.desc(), id.desc()),
+        # Radius and viewport queries; see app.core.geo.point_expr
+        Index("ix_listing_location_point", func.point(longitude, latitude), postgresql_using="gist"),
+        # Cell lookups by geohash prefix (geohash LIKE 'tq%')
+        Index("ix_listing_geohash", "geohash", postgresql_ops={"geohash": "text_pattern_ops"}),
+    )
+
+register_search_document(Listing, ("title", "location"))
+register_geohash(Listing)
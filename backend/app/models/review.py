@@ -1,15 +1,35 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.base_class import Base
+from app.core.search import SEARCH_VECTOR_SQL, register_search_document
 
 class Review(Base):
     id = Column(Integer, primary_key=True, index=True)
-    listing_id = Column(Integer, ForeignKey("listing.id", ondelete="CASCADE"), index=True)
+    listing_id = Column(Integer, ForeignKey("listing.id", ondelete="CASCADE"))
     user_name = Column(String, index=True)
     rating = Column(Integer, default=5)
     comment = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Maintained by app.core.search; never returned by the API
+    search_document = deferred(Column(Text))
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
     listing = relationship("Listing", back_populates="reviews")
+
+    __table_args__ = (
+        # Serves the (created_at, id) keyset order of the reviews list
+        Index("ix_review_created_at_id", "created_at", "id"),
+        # The same order for one listing's reviews; also serves the FK
+        Index("ix_review_listing_id_created_at_id", "listing_id", created_at.desc(), id.desc()),
+        Index("ix_review_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_review_search_document_trgm", "search_document",
+            postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"}
+        ),
+    )
+
+register_search_document(Review, ("user_name", "comment"))
@@ -1,6 +1,9 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred
 from app.db.base_class import Base
+from app.core.search import SEARCH_VECTOR_SQL, register_search_document
 
 class User(Base):
     id = Column(Integer, primary_key=True, index=True)
@@ -11,3 +14,17 @@ class User(Base):
     status = Column(String, default="active") # active, blocked
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Maintained by app.core.search; never returned by the API
+    search_document = deferred(Column(Text))
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    __table_args__ = (
+        Index("ix_user_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_user_search_document_trgm", "search_document",
+            postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"}
+        ),
+    )
+
+register_search_document(User, ("full_name", "email"))
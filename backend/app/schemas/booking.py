@@ -40,7 +40,10 @@ class Booking(BookingInDBBase):
 
 class BookingPagination(BaseModel):
     items: List[Booking]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    # Opaque keyset cursors, only set when pagination=cursor
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
@@ -0,0 +1,18 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+class BulkItemResult(BaseModel):
+    # Position of the item in the request
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[Any] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class BulkStatusUpdate(BaseModel):
+    ids: List[int]
+    status: str
@@ -42,11 +42,42 @@ class ListingInDBBase(ListingBase):
         from_attributes = True
 
 class Listing(ListingInDBBase):
-    pass
+    # Only set for radius (lat/lng) searches
+    distance_km: Optional[float] = None
+
+class ListingCluster(BaseModel):
+    """
+    Listings of one geohash cell, for map views at low zoom.
+    """
+    geohash: str
+    count: int
+    latitude: float
+    longitude: float
+    min_price: Optional[float] = None
+    # Set when the cell holds a single listing
+    listing_id: Optional[int] = None
+
+class PriceBucket(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int
+
+class ListingFacets(BaseModel):
+    # amenity key -> listings that have it
+    amenities: Dict[str, int]
+    price: List[PriceBucket]
+    # threshold -> listings with at least that many guests/rooms
+    guests: Dict[str, int]
+    rooms: Dict[str, int]
 
 class ListingPagination(BaseModel):
     items: List[Listing]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    # Opaque keyset cursors, only set when pagination=cursor
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    # Only set when facets=true
+    facets: Optional[ListingFacets] = None
@@ -7,3 +7,7 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    # Tokens issued before revocation support carry neither
+    jti: Optional[str] = None
+    iat: Optional[float] = None
+    exp: Optional[float] = None
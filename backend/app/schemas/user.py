@@ -25,9 +25,25 @@ class UserInDBBase(UserBase):
 class User(UserInDBBase):
     pass
 
+class Principal(BaseModel):
+    """
+    The authenticated user as cached for request authorization.
+    """
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    role: Optional[str] = None
+    status: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class UserPagination(BaseModel):
     items: List[User]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    # Opaque keyset cursors, only set when pagination=cursor
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
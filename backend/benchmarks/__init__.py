@@ -0,0 +1,21 @@
+"""
+Load benchmarks for the API.
+
+1. Fill a database with a synthetic dataset (deterministic per seed):
+       python -m benchmarks.datagen --scale 100 --truncate
+2. For the proxy and upload scenarios, start the fake Telegram server and
+   point the app at it:
+       python -m benchmarks.fake_telegram --port 8081
+       TELEGRAM_API_URL=http://127.0.0.1:8081 TELEGRAPH_URL=http://127.0.0.1:8081 \\
+       TELEGRAM_BOT_TOKEN=bench TELEGRAM_CHANNEL_ID=bench uvicorn app.main:app
+3. Run scenarios and keep the results:
+       python -m benchmarks run --out results-$(git rev-parse --short HEAD).json
+4. Compare two runs (e.g. before/after a change):
+       python -m benchmarks compare results-abc123.json results-def456.json
+
+Scenarios: feed (public listing pages and details), admin_lists,
+bookings_list (rows/sec and server memory), booking_burst (concurrent
+POSTs for overlapping dates, then a check in the database, so it needs
+DATABASE_URL or --database-url), proxy (proxy fetches under feed load),
+uploads, login_storm (feed latency while logins hash passwords).
+"""
@@ -0,0 +1,73 @@
+"""
+    python -m benchmarks run feed admin_lists --base-url http://127.0.0.1:8000 --out base.json
+    python -m benchmarks compare base.json new.json
+"""
+import argparse
+import asyncio
+import os
+
+import httpx
+
+from benchmarks import report
+from benchmarks.scenarios import SCENARIOS, Context, discover
+
+
+async def run(args) -> dict:
+    ctx = Context(
+        concurrency=args.concurrency,
+        requests=None if args.duration else args.requests,
+        duration=args.duration,
+        seed=args.seed,
+        server_pid=args.server_pid,
+        database_url=args.database_url,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120.0) as client:
+        await discover(ctx, client)
+        results = report.new_report({
+            "base_url": args.base_url, "concurrency": ctx.concurrency, "requests": ctx.requests,
+            "duration": ctx.duration, "seed": ctx.seed, "listings": ctx.listings, "users": ctx.users,
+        })
+        for name in args.scenarios:
+            print(f"Bench: running {name}")
+            results["scenarios"][name] = await SCENARIOS[name](ctx, client)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run scenarios against a server")
+    run_parser.add_argument("scenarios", nargs="*", help=f"default: all of {', '.join(SCENARIOS)}")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--requests", type=int, default=2000, help="per measured part")
+    run_parser.add_argument("--duration", type=float, help="seconds per measured part, instead of --requests")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--server-pid", type=int, help="sample this process's RSS (bookings_list)")
+    run_parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                            help="checked for overlapping bookings after booking_burst (default: $DATABASE_URL)")
+    run_parser.add_argument("--out", help="write results JSON here")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        report.compare(report.load(args.base), report.load(args.new))
+        return
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    results = asyncio.run(run(args))
+    report.print_report(results)
+    if args.out:
+        report.save(results, args.out)
+
+
+if __name__ == "__main__":
+    main()
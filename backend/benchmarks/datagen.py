@@ -0,0 +1,204 @@
+"""
+Deterministic synthetic dataset at a configurable scale.
+
+Scale 1 is 1,000 listings, 500 users, 10,000 bookings and 3,000 reviews;
+everything grows linearly, so --scale 100 gives 100k listings and a
+million bookings. The same --seed and --scale always produce the same
+rows with the same ids, so runs on different commits see identical data.
+
+Rows are streamed into Postgres with COPY in chunks (memory stays flat at
+any scale). Derived columns are filled the way the app fills them:
+search documents and geohashes while generating, ratings and the Redis
+row counters afterwards.
+
+    python -m benchmarks.datagen --scale 10 --truncate
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy import text
+
+from app.core import cache, security
+from app.core.geo import encode_geohash
+from app.core.search import build_document
+from app.db.counts import reconcile_counts
+from app.db.ratings import recompute_ratings
+from app.db.session import SessionLocal, engine
+from benchmarks.dataset import AMENITY_KEYS, BENCH_EMAIL, BENCH_PASSWORD, REGIONS, REGION_WEIGHTS
+
+PER_SCALE = {"listing": 1000, "user": 500, "booking": 10000, "review": 3000}
+COPY_CHUNK_ROWS = 20000
+
+TITLE_WORDS = ["Dacha", "Villa", "Bog'", "Tog'", "Soy", "Oromgoh", "Uy", "Retreat", "Cabin", "Mansion"]
+ADJECTIVES = ["Lux", "Oilaviy", "Premium", "Shinam", "Yashil", "Sokin", "Grand", "Sunrise"]
+FIRST_NAMES = ["Aziz", "Dilnoza", "Jasur", "Malika", "Otabek", "Nodira", "Sardor", "Zarina", "Anvar", "Gulnora"]
+LAST_NAMES = ["Karimov", "Rashidova", "Toshmatov", "Yusupova", "Aliyev", "Saidova", "Nazarov", "Ergasheva"]
+COMMENTS = [
+    "Juda yaxshi joy, hammasi toza.", "Basseyn ajoyib, yana kelamiz.", "Отличная дача, рекомендую.",
+    "Tabiat chiroyli, lekin yo'l biroz yomon.", "Хорошее место для семьи.", "Great view and friendly hosts.",
+]
+START_DATE = datetime(2025, 1, 1)
+
+
+def counts_for(scale: float) -> dict:
+    return {table: max(1, int(n * scale)) for table, n in PER_SCALE.items()}
+
+
+def _listings(rng: random.Random, n: int) -> Iterator[list]:
+    regions = list(REGIONS)
+    for i in range(1, n + 1):
+        region = rng.choices(regions, REGION_WEIGHTS)[0]
+        lat, lng = REGIONS[region]
+        lat, lng = round(lat + rng.uniform(-0.3, 0.3), 6), round(lng + rng.uniform(-0.3, 0.3), 6)
+        title = f"{rng.choice(ADJECTIVES)} {rng.choice(TITLE_WORDS)} {i}"
+        location = f"{region.capitalize()}, {rng.choice(TITLE_WORDS)} ko'chasi {rng.randint(1, 200)}"
+        amenities = {key: rng.random() < 0.5 for key in AMENITY_KEYS}
+        images = [f"https://picsum.photos/seed/bench-{i}-{k}/1200/800" for k in range(4)]
+        yield [
+            i, title, region, location, rng.randrange(300_000, 5_000_000, 50_000),
+            rng.randint(2, 30), rng.randint(1, 8), rng.randint(1, 12), rng.randint(1, 5),
+            json.dumps(amenities), json.dumps(images), f"{title}. {location}.",
+            lat, lng, encode_geohash(lat, lng),
+            "active" if rng.random() < 0.95 else "inactive",
+            START_DATE - timedelta(days=rng.randint(0, 700)),
+            build_document(title, location),
+        ]
+
+
+def _users(rng: random.Random, n: int, hashed_password: str) -> Iterator[list]:
+    for i in range(1, n + 1):
+        full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        email = BENCH_EMAIL.format(i)
+        yield [
+            i, full_name, email, hashed_password, "admin" if i == 1 else "user", "active",
+            START_DATE - timedelta(days=rng.randint(0, 700)), build_document(full_name, email),
+        ]
+
+
+def _bookings(rng: random.Random, n: int, listings: int, users: int) -> Iterator[list]:
+    # Each listing's stays are laid out one after another, so they never
+    # overlap (the exclusion constraint would reject the COPY otherwise)
+    per_listing, extra = divmod(n, listings)
+    booking_id = 0
+    for listing_id in range(1, listings + 1):
+        day = START_DATE + timedelta(days=rng.randint(0, 30))
+        for _ in range(per_listing + (1 if listing_id <= extra else 0)):
+            booking_id += 1
+            nights = rng.randint(1, 7)
+            check_in = day + timedelta(days=rng.randint(0, 6))
+            check_out = check_in + timedelta(days=nights)
+            day = check_out
+            status = rng.choices(["confirmed", "pending", "cancelled"], [50, 30, 20])[0]
+            yield [
+                booking_id, rng.randint(1, users) if rng.random() < 0.7 else None, listing_id,
+                check_in, check_out, rng.randint(1, 15), nights * rng.randrange(300_000, 5_000_000, 50_000),
+                status, check_in - timedelta(days=rng.randint(1, 60)),
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"+99890{rng.randint(1000000, 9999999)}",
+            ]
+
+
+def _reviews(rng: random.Random, n: int, listings: int) -> Iterator[list]:
+    for i in range(1, n + 1):
+        user_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        comment = rng.choice(COMMENTS)
+        yield [
+            i, rng.randint(1, listings), user_name, rng.choices([1, 2, 3, 4, 5], [3, 5, 12, 35, 45])[0],
+            comment, START_DATE + timedelta(minutes=rng.randint(0, 700 * 24 * 60)),
+            build_document(user_name, comment),
+        ]
+
+
+def _copy(raw, table: str, columns: Sequence[str], rows: Iterable[list]) -> int:
+    sql = f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    written = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        buffer.seek(0)
+        with raw.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        writer.writerow(["" if v is None else v.isoformat() if isinstance(v, datetime) else v for v in row])
+        written += 1
+        if written % COPY_CHUNK_ROWS == 0:
+            flush()
+    flush()
+    with raw.cursor() as cursor:
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), {max(written, 1)})")
+    return written
+
+
+def _timed(label: str, fn: Callable[[], int]) -> None:
+    started = time.perf_counter()
+    n = fn()
+    print(f"Datagen: {label}: {n} rows in {time.perf_counter() - started:.1f}s")
+
+
+def generate(scale: float, seed: int, truncate: bool = False) -> dict:
+    counts = counts_for(scale)
+    with engine.connect() as conn:
+        existing = conn.execute(text('SELECT (SELECT count(*) FROM listing) + (SELECT count(*) FROM "user")')).scalar()
+    if existing and not truncate:
+        raise SystemExit("Datagen: database is not empty, pass --truncate to replace its data")
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            if truncate:
+                cursor.execute('TRUNCATE review, booking, listing, "user" RESTART IDENTITY CASCADE')
+        # One hash for everyone: hashing per user would dominate the run
+        hashed_password = security.get_password_hash(BENCH_PASSWORD)
+        _timed("listings", lambda: _copy(raw, "listing", [
+            "id", "title", "region", "location", "price_per_night", "guests_max", "rooms", "beds", "baths",
+            "amenities", "images", "description", "latitude", "longitude", "geohash", "status",
+            "created_at", "search_document",
+        ], _listings(random.Random(f"{seed}:listing"), counts["listing"])))
+        _timed("users", lambda: _copy(raw, "user", [
+            "id", "full_name", "email", "hashed_password", "role", "status", "created_at", "search_document",
+        ], _users(random.Random(f"{seed}:user"), counts["user"], hashed_password)))
+        _timed("bookings", lambda: _copy(raw, "booking", [
+            "id", "user_id", "listing_id", "check_in", "check_out", "guests", "total_price", "status",
+            "created_at", "customer_name", "customer_phone",
+        ], _bookings(random.Random(f"{seed}:booking"), counts["booking"], counts["listing"], counts["user"])))
+        _timed("reviews", lambda: _copy(raw, "review", [
+            "id", "listing_id", "user_name", "rating", "comment", "created_at", "search_document",
+        ], _reviews(random.Random(f"{seed}:review"), counts["review"], counts["listing"])))
+        raw.commit()
+    finally:
+        raw.close()
+
+    db = SessionLocal()
+    try:
+        _timed("ratings", lambda: recompute_ratings(db))
+        try:
+            print(f"Datagen: reconciled row counts: {reconcile_counts(db)}")
+            cache.invalidate_tags("listings")
+        except Exception as e:
+            print(f"Datagen: could not refresh Redis counters/cache: {e}")
+    finally:
+        db.close()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="1 = 1k listings, 10k bookings")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="replace existing listings, users, bookings and reviews")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    counts = generate(args.scale, args.seed, args.truncate)
+    print(f"Datagen: {counts} (scale {args.scale}, seed {args.seed}) in {time.perf_counter() - started:.1f}s")
+    print(f"Datagen: users log in as {BENCH_EMAIL.format('<n>')} / {BENCH_PASSWORD}")
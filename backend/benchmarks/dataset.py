@@ -0,0 +1,22 @@
+"""
+Dataset facts shared by the generator and the load scenarios. Kept free
+of app imports so the load generator runs without the app's dependencies.
+"""
+
+# Every generated user can log in with this (used by the login scenario)
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL = "bench-user-{}@example.com"
+
+# name -> (latitude, longitude) of the region's centre
+REGIONS = {
+    "zomin": (39.96, 68.40),
+    "jizzax": (40.12, 67.84),
+    "baxmal": (39.73, 67.70),
+    "forish": (40.55, 66.85),
+    "chimgan": (41.55, 70.02),
+    "bostanliq": (41.62, 69.85),
+    "samarqand": (39.65, 66.96),
+    "toshkent": (41.30, 69.24),
+}
+REGION_WEIGHTS = [30, 20, 10, 8, 12, 10, 5, 5]
+AMENITY_KEYS = ["pool", "sauna", "bbq", "wifi", "ac", "kitchen", "karaoke", "billiards"]
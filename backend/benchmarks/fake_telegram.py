@@ -0,0 +1,99 @@
+"""
+Local stand-in for the Telegram Bot API and telegra.ph.
+
+Serves getFile, file downloads, sendDocument and the telegra.ph upload
+endpoint with a fixed latency and deterministic file bodies, so proxy and
+upload benchmarks measure the app rather than the internet. Start the app
+with TELEGRAM_API_URL and TELEGRAPH_URL pointing here and any
+TELEGRAM_BOT_TOKEN / TELEGRAM_CHANNEL_ID.
+
+    python -m benchmarks.fake_telegram --port 8081 --latency-ms 30
+"""
+import argparse
+import asyncio
+import itertools
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+CHUNK_BYTES = 64 * 1024
+
+_config = {"latency": 0.0, "file_bytes": 256 * 1024}
+_ids = itertools.count(1)
+_stats = {"get_file": 0, "downloads": 0, "uploads": 0, "bytes_sent": 0}
+
+
+async def _delay() -> None:
+    if _config["latency"]:
+        await asyncio.sleep(_config["latency"])
+
+
+async def get_file(request: Request):
+    await _delay()
+    _stats["get_file"] += 1
+    file_id = request.query_params.get("file_id", "")
+    if not file_id:
+        return JSONResponse({"ok": False, "description": "Bad Request: file_id is empty"}, status_code=400)
+    return JSONResponse({"ok": True, "result": {"file_id": file_id, "file_path": f"photos/{file_id}.jpg"}})
+
+
+async def download(request: Request):
+    await _delay()
+    _stats["downloads"] += 1
+    size = _config["file_bytes"]
+    # Same bytes for the same path, so cached and fresh responses compare equal
+    pattern = (request.path_params["path"].encode() * (CHUNK_BYTES // 8 + 1))[:CHUNK_BYTES]
+
+    async def body():
+        remaining = size
+        while remaining > 0:
+            chunk = pattern[:min(remaining, CHUNK_BYTES)]
+            remaining -= len(chunk)
+            _stats["bytes_sent"] += len(chunk)
+            yield chunk
+
+    return StreamingResponse(body(), media_type="image/jpeg", headers={"Content-Length": str(size)})
+
+
+async def send_document(request: Request):
+    async with request.form() as form:
+        await form["document"].read()
+    await _delay()
+    _stats["uploads"] += 1
+    n = next(_ids)
+    return JSONResponse({"ok": True, "result": {"message_id": n, "document": {"file_id": f"fake-doc-{n}"}}})
+
+
+async def telegraph_upload(request: Request):
+    async with request.form() as form:
+        await form["file"].read()
+    await _delay()
+    _stats["uploads"] += 1
+    return JSONResponse([{"src": f"/file/fake-{next(_ids)}.jpg"}])
+
+
+async def stats(request: Request):
+    return JSONResponse(_stats)
+
+
+app = Starlette(routes=[
+    Route("/bot{token}/getFile", get_file),
+    Route("/file/bot{token}/{path:path}", download),
+    Route("/bot{token}/sendDocument", send_document, methods=["POST"]),
+    Route("/upload", telegraph_upload, methods=["POST"]),
+    Route("/stats", stats),
+])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="added to every response")
+    parser.add_argument("--file-bytes", type=int, default=256 * 1024, help="size of every downloaded file")
+    args = parser.parse_args()
+    _config.update(latency=args.latency_ms / 1000, file_bytes=args.file_bytes)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
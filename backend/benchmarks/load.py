@@ -0,0 +1,84 @@
+"""
+Closed-loop load generator: `concurrency` workers send requests back to
+back until `requests` have been sent or `duration` seconds have passed,
+and every request's latency and status is recorded.
+"""
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+import httpx
+
+# Called with the shared client and the request's sequence number
+RequestFn = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Samples:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    bytes: int = 0
+    elapsed: float = 0.0
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: Samples) -> dict:
+    latencies = sorted(samples.latencies)
+    ms = [v * 1000 for v in latencies]
+    n = len(ms)
+    errors = sum(count for status, count in samples.statuses.items() if status == 0 or status >= 500)
+    return {
+        "requests": n,
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(samples.statuses.items())},
+        "throughput_rps": round(n / samples.elapsed, 1) if samples.elapsed else 0.0,
+        "mb_per_s": round(samples.bytes / samples.elapsed / 1e6, 2) if samples.elapsed else 0.0,
+        "mean_ms": round(sum(ms) / n, 2) if n else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(ms[-1], 2) if n else 0.0,
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    send: RequestFn,
+    concurrency: int,
+    requests: Optional[int] = None,
+    duration: Optional[float] = None,
+) -> Samples:
+    if requests is None and duration is None:
+        raise ValueError("give requests or duration")
+    samples = Samples()
+    sequence = iter(range(requests if requests is not None else 2 ** 62))
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    async def worker():
+        for i in sequence:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            sent = time.perf_counter()
+            try:
+                response = await send(client, i)
+                samples.statuses[response.status_code] += 1
+                samples.bytes += len(response.content)
+            except httpx.HTTPError:
+                samples.statuses[0] += 1
+            samples.latencies.append(time.perf_counter() - sent)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    samples.elapsed = time.perf_counter() - started
+    return samples
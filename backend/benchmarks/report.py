@@ -0,0 +1,97 @@
+"""
+Result files and comparisons across commits.
+
+A result file is JSON: run metadata (commit, time, options, dataset size)
+plus, per scenario, one summary per measured part (see load.summarize)
+and any extra scenario metrics.
+"""
+import json
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+# Lower is better for these; everything else numeric is higher-is-better
+LOWER_IS_BETTER = ("_ms", "_mb", "errors", "overlapping_bookings", "rounds_without_success")
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_report(options: dict) -> dict:
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "options": options,
+        "scenarios": {},
+    }
+
+
+def save(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Bench: results written to {path}")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_report(report: dict) -> None:
+    print(f"\ncommit {report.get('commit')}  {report.get('started_at')}")
+    header = f"{'scenario/part':40} {'reqs':>7} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for scenario, parts in report["scenarios"].items():
+        for part, values in parts.items():
+            if isinstance(values, dict) and "p50_ms" in values:
+                print(
+                    f"{scenario + '/' + part:40} {values['requests']:>7} {values['errors']:>5} "
+                    f"{values['throughput_rps']:>9} {values['p50_ms']:>9} {values['p95_ms']:>9} {values['p99_ms']:>9}"
+                )
+            else:
+                print(f"{scenario + '/' + part:40} {values}")
+
+
+def _change(metric: str, before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    pct = (after - before) / before * 100
+    better = pct < 0 if metric.endswith(LOWER_IS_BETTER) else pct > 0
+    mark = "" if abs(pct) < 5 else (" better" if better else " WORSE")
+    return f"{pct:+.1f}%{mark}"
+
+
+def compare(base: dict, new: dict) -> None:
+    """
+    Prints p50/p95/p99/throughput (and numeric scenario metrics) of every
+    part measured in both runs. Changes under 5% are left unmarked.
+    """
+    print(f"base {base.get('commit')} ({base.get('started_at')})  ->  new {new.get('commit')} ({new.get('started_at')})")
+    for scenario, parts in new["scenarios"].items():
+        base_parts = base["scenarios"].get(scenario)
+        if not base_parts:
+            print(f"{scenario}: not in base run")
+            continue
+        for part, values in parts.items():
+            before = base_parts.get(part)
+            if before is None:
+                continue
+            if isinstance(values, dict):
+                metrics = [m for m in COMPARED if m in values] or [
+                    m for m, v in values.items() if isinstance(v, (int, float))
+                ]
+                for metric in metrics:
+                    print(
+                        f"{scenario + '/' + part:40} {metric:16} {before.get(metric, 0):>10} -> "
+                        f"{values[metric]:>10}  {_change(metric, before.get(metric, 0), values[metric])}"
+                    )
+            elif isinstance(values, (int, float)):
+                print(f"{scenario + '/' + part:40} {'':16} {before:>10} -> {values:>10}  {_change(part, before, values)}")
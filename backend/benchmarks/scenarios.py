@@ -0,0 +1,327 @@
+"""
+Load scenarios against a running server.
+
+Each scenario returns {part: summary-or-metric}. Request parameters come
+from a Random seeded per request, so two runs with the same --seed send
+the same request sequence (per worker interleaving aside).
+"""
+import asyncio
+import io
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.dataset import AMENITY_KEYS, BENCH_EMAIL, BENCH_PASSWORD, REGIONS, REGION_WEIGHTS
+from benchmarks.load import Samples, run_load, summarize
+
+API = "/api/v1"
+PROXY_FILES = 200
+
+
+@dataclass
+class Context:
+    concurrency: int
+    requests: Optional[int]
+    duration: Optional[float]
+    seed: int
+    server_pid: Optional[int]
+    database_url: Optional[str] = None
+    listings: int = 0
+    users: int = 0
+
+    def rng(self, i: int) -> random.Random:
+        return random.Random(self.seed * 1_000_003 + i)
+
+    async def load(self, client, send, concurrency=None, share=1.0) -> Samples:
+        requests = max(1, int(self.requests * share)) if self.requests is not None else None
+        return await run_load(client, send, concurrency or self.concurrency, requests, self.duration)
+
+
+async def discover(ctx: Context, client: httpx.AsyncClient) -> None:
+    """
+    Reads the dataset size from the API; datagen ids are 1..n.
+    """
+    listings = (await client.get(f"{API}/listings/", params={"status": "all", "size": 1})).json()
+    users = (await client.get(f"{API}/users/", params={"size": 1})).json()
+    ctx.listings, ctx.users = listings["total"], users["total"]
+    if not ctx.listings:
+        raise SystemExit("Bench: no listings, run python -m benchmarks.datagen first")
+
+
+def _feed_request(ctx: Context):
+    regions = list(REGIONS)
+
+    async def send(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        rng = ctx.rng(i)
+        roll = rng.random()
+        if roll < 0.4:
+            return await client.get(f"{API}/listings/{rng.randint(1, ctx.listings)}")
+        params = {"size": 12, "status": "active"}
+        if rng.random() < 0.6:
+            params["region"] = rng.choices(regions, REGION_WEIGHTS)[0]
+        if rng.random() < 0.2:
+            params["sort"] = "rating"
+        if rng.random() < 0.2:
+            params["amenities"] = ",".join(rng.sample(AMENITY_KEYS, 2))
+        if roll < 0.9:
+            params["page"] = rng.choices([1, 2, 3, 4, 5], [50, 20, 15, 10, 5])[0]
+        else:
+            params["pagination"] = "cursor"
+        return await client.get(f"{API}/listings/", params=params)
+
+    return send
+
+
+async def feed(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Public feed: listing pages (region, rating sort, amenity filters) and
+    listing details, mostly first pages.
+    """
+    return {"mixed": summarize(await ctx.load(client, _feed_request(ctx)))}
+
+
+async def admin_lists(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Admin panel lists, each measured on its own.
+    """
+    def pages(path: str, extra: Callable[[random.Random], dict]):
+        async def send(client, i):
+            rng = ctx.rng(i)
+            params = {"size": 20, "page": rng.randint(1, 50), **extra(rng)}
+            return await client.get(f"{API}{path}", params=params)
+        return send
+
+    parts = {
+        "bookings": pages("/bookings/", lambda rng: {}),
+        "bookings_by_status": pages("/bookings/", lambda rng: {"status": rng.choice(["pending", "confirmed"])}),
+        "reviews_by_listing": pages("/reviews/", lambda rng: {"listing_id": rng.randint(1, ctx.listings), "page": 1}),
+        "users": pages("/users/", lambda rng: {}),
+    }
+    return {name: summarize(await ctx.load(client, send)) for name, send in parts.items()}
+
+
+class RssSampler:
+    """
+    Samples a server process's resident memory (Linux /proc) while running.
+    """
+
+    def __init__(self, pid: Optional[int]):
+        self.pid, self.peak, self.start, self._task = pid, 0, 0, None
+
+    def _read_mb(self) -> float:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def _sample(self):
+        while True:
+            self.peak = max(self.peak, self._read_mb())
+            await asyncio.sleep(0.05)
+
+    def __enter__(self):
+        if self.pid:
+            self.start = self.peak = self._read_mb()
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+        return self
+
+    def __exit__(self, *exc):
+        if self._task:
+            self._task.cancel()
+
+    def metrics(self) -> dict:
+        if not self.pid:
+            return {}
+        return {"rss_start_mb": round(self.start, 1), "rss_peak_mb": round(self.peak, 1)}
+
+
+async def bookings_list(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Rows/sec of the bookings list (100-row offset pages and a cursor walk)
+    and of a full NDJSON export, with the server's peak RSS when
+    --server-pid is given (run the server with a single worker).
+    """
+    result = {}
+    with RssSampler(ctx.server_pid) as rss:
+        async def page(client, i):
+            return await client.get(f"{API}/bookings/", params={"size": 100, "page": ctx.rng(i).randint(1, 100)})
+        samples = await ctx.load(client, page)
+        result["page_100"] = {**summarize(samples), "rows_per_s": round(100 * len(samples.latencies) / samples.elapsed)}
+
+        rows, cursor, started = 0, None, time.perf_counter()
+        for _ in range(max(1, (ctx.requests or 200) // 10)):
+            params = {"size": 100, "pagination": "cursor", **({"cursor": cursor} if cursor else {})}
+            body = (await client.get(f"{API}/bookings/", params=params)).json()
+            rows += len(body["items"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        result["cursor_walk_rows_per_s"] = round(rows / (time.perf_counter() - started))
+
+        rows, first_byte, started = 0, None, time.perf_counter()
+        async with client.stream("GET", f"{API}/bookings/export", params={"format": "ndjson"}) as response:
+            async for line in response.aiter_lines():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                rows += bool(line)
+        elapsed = time.perf_counter() - started
+        result["export"] = {
+            "rows": rows,
+            "ttfb_ms": round((first_byte or elapsed) * 1000, 1),
+            "rows_per_s": round(rows / elapsed),
+        }
+    result["export"].update(rss.metrics())
+    return result
+
+
+OVERLAPPING_BOOKINGS_SQL = """
+SELECT count(*) FROM booking a
+JOIN booking b ON b.listing_id = a.listing_id AND b.id > a.id
+    AND b.check_in < a.check_out AND a.check_in < b.check_out
+WHERE a.listing_id IN :listing_ids AND a.status <> 'cancelled' AND b.status <> 'cancelled'
+"""
+
+
+def _overlapping_bookings(database_url: str, listing_ids: List[int]) -> int:
+    """
+    Pairs of non-cancelled bookings of these listings whose dates overlap,
+    straight from the database.
+    """
+    from sqlalchemy import bindparam, create_engine, text
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            query = text(OVERLAPPING_BOOKINGS_SQL).bindparams(bindparam("listing_ids", expanding=True))
+            return conn.execute(query, {"listing_ids": listing_ids}).scalar()
+    finally:
+        engine.dispose()
+
+
+async def booking_burst(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Rounds of `concurrency` simultaneous POST /bookings for one listing
+    with partially overlapping stays: [d, d+2), [d+1, d+3) and [d+2, d+4)
+    in turn. Whatever the server accepts, no two non-cancelled bookings
+    may overlap afterwards; that is checked in the database (--database-url)
+    before the created bookings are deleted, and the run fails if any do.
+    """
+    if not ctx.database_url:
+        raise SystemExit("Bench: booking_burst needs --database-url (or DATABASE_URL) to check for overlaps")
+    rounds = max(1, (ctx.requests or 20 * ctx.concurrency) // ctx.concurrency)
+    samples, created, listing_ids = Samples(), [], set()
+    lost = 0
+    started = time.perf_counter()
+    # Past the datagen calendar, so every round starts from free dates
+    first_day = datetime(2031, 1, 1)
+    for r in range(rounds):
+        listing_id = ctx.rng(r).randint(1, ctx.listings)
+        listing_ids.add(listing_id)
+        day = first_day + timedelta(days=5 * r)
+
+        async def post(k: int):
+            check_in = day + timedelta(days=k % 3)
+            payload = {
+                "listing_id": listing_id,
+                "check_in": check_in.isoformat(),
+                "check_out": (check_in + timedelta(days=2)).isoformat(),
+                "guests": 4, "total_price": 1_000_000,
+                "customer_name": "Bench Burst", "customer_phone": "+998900000000",
+            }
+            sent = time.perf_counter()
+            try:
+                response = await client.post(f"{API}/bookings/", json=payload)
+                status = response.status_code
+                if status == 200:
+                    created.append(response.json()["id"])
+            except httpx.HTTPError:
+                status = 0
+            samples.latencies.append(time.perf_counter() - sent)
+            samples.statuses[status] += 1
+            return status
+
+        statuses = await asyncio.gather(*(post(k) for k in range(ctx.concurrency)))
+        lost += 200 not in statuses
+    samples.elapsed = time.perf_counter() - started
+    overlapping = await asyncio.to_thread(_overlapping_bookings, ctx.database_url, sorted(listing_ids))
+    for booking_id in created:
+        await client.delete(f"{API}/bookings/{booking_id}")
+    if overlapping:
+        raise SystemExit(f"Bench: booking_burst left {overlapping} overlapping booking pairs")
+    return {
+        "post": summarize(samples), "rounds": rounds, "accepted": len(created),
+        "overlapping_bookings": overlapping, "rounds_without_success": lost,
+    }
+
+
+async def proxy(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Telegram proxy fetches (skewed towards popular files, so the media
+    cache sees hits) alongside the public feed, compared with the feed
+    alone. Needs the server pointed at benchmarks.fake_telegram.
+    """
+    async def fetch(client, i):
+        n = min(int(ctx.rng(i).paretovariate(1.2)), PROXY_FILES)
+        return await client.get(f"{API}/proxy/telegram/bench-file-{n}.jpg")
+
+    alone = await ctx.load(client, _feed_request(ctx), share=0.5)
+    proxied, during = await asyncio.gather(ctx.load(client, fetch), ctx.load(client, _feed_request(ctx)))
+    return {"feed_alone": summarize(alone), "proxy": summarize(proxied), "feed_during_proxy": summarize(during)}
+
+
+def _sample_jpeg() -> bytes:
+    from PIL import Image
+
+    size = (1200, 800)
+    image = Image.merge("RGB", [
+        Image.linear_gradient("L").resize(size),
+        Image.radial_gradient("L").resize(size),
+        Image.linear_gradient("L").rotate(90).resize(size),
+    ])
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+async def uploads(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Single-image uploads through /upload/file to the fake telegra.ph.
+    """
+    body = _sample_jpeg()
+
+    async def send(client, i):
+        return await client.post(f"{API}/upload/file", files={"file": (f"bench-{i}.jpg", body, "image/jpeg")})
+
+    return {"jpeg": {**summarize(await ctx.load(client, send, share=0.25)), "file_kb": len(body) // 1024}}
+
+
+async def login_storm(ctx: Context, client: httpx.AsyncClient) -> dict:
+    """
+    Logins (bcrypt) in parallel with feed reads, compared with the reads
+    alone: reads should not slow down while the password pool is busy.
+    """
+    async def login(client, i):
+        n = ctx.rng(i).randint(1, ctx.users)
+        return await client.post(
+            f"{API}/login/access-token", data={"username": BENCH_EMAIL.format(n), "password": BENCH_PASSWORD}
+        )
+
+    alone = await ctx.load(client, _feed_request(ctx), share=0.5)
+    logins, during = await asyncio.gather(ctx.load(client, login, share=0.1), ctx.load(client, _feed_request(ctx)))
+    return {"reads_alone": summarize(alone), "login": summarize(logins), "reads_during_logins": summarize(during)}
+
+
+SCENARIOS: Dict[str, Callable[[Context, httpx.AsyncClient], Awaitable[dict]]] = {
+    "feed": feed,
+    "admin_lists": admin_lists,
+    "bookings_list": bookings_list,
+    "booking_burst": booking_burst,
+    "proxy": proxy,
+    "uploads": uploads,
+    "login_storm": login_storm,
+}
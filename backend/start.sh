@@ -7,7 +7,8 @@ while ! nc -z db 5432; do
 done
 echo "PostgreSQL started"
 
-# Initialize database
+# Apply migrations, then seed reference data
+alembic upgrade head
 python -m app.db.init_db
 
 # Start uvicorn